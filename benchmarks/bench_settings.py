@@ -0,0 +1,88 @@
+"""Times settings validation: the typed model against the original validate_settings().
+
+Run from the repository root:  python benchmarks/bench_settings.py
+"""
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings_model import CrosshairSettings
+
+def legacy_validate_settings(data):
+    """validate_settings() from src/server.py before the settings model, kept verbatim for comparison."""
+    if not isinstance(data, dict):
+        raise ValueError("Settings must be a dictionary.")
+
+    valid_types = {'parametric', 'static', 'animated'}
+    if 'type' not in data or data['type'] not in valid_types:
+        raise ValueError(f"Invalid or missing 'type'. Must be one of {valid_types}.")
+
+    for key in valid_types:
+        if key not in data or not isinstance(data[key], dict):
+            raise ValueError(f"Missing or invalid '{key}' settings dictionary.")
+
+    p = data['parametric']
+    bool_keys_p = ['center_dot_enabled', 'inner_lines_enabled', 'outer_lines_enabled', 'outline_enabled', 't_shape']
+    num_keys_p = ['center_dot_size', 'center_dot_opacity', 'inner_lines_thickness',
+                    'inner_lines_length', 'inner_lines_gap', 'inner_lines_opacity',
+                    'outer_lines_thickness', 'outer_lines_length', 'outer_lines_gap',
+                    'outer_lines_opacity', 'outline_thickness', 'outline_opacity']
+    color_keys_p = ['center_dot_color', 'inner_lines_color', 'outer_lines_color', 'outline_color']
+
+    for key in bool_keys_p:
+        if key not in p or not isinstance(p[key], bool): raise ValueError(f"Parametric setting '{key}' must be a boolean.")
+    for key in num_keys_p:
+        if key not in p or not isinstance(p[key], (int, float)): raise ValueError(f"Parametric setting '{key}' must be a number.")
+        if 'opacity' in key and not (0 <= p[key] <= 255): raise ValueError(f"Parametric opacity '{key}' must be between 0 and 255.")
+        if ('size' in key or 'thickness' in key or 'length' in key or 'gap' in key) and p[key] < 0:
+             raise ValueError(f"Parametric dimension '{key}' cannot be negative.")
+    for key in color_keys_p:
+         if key not in p or not isinstance(p[key], str) or not re.match(r'^#[0-9A-Fa-f]{6}$', p[key]):
+              raise ValueError(f"Parametric color '{key}' must be a valid hex string (e.g., #RRGGBB).")
+
+    s = data['static']
+    if 'image_path' not in s or not (isinstance(s['image_path'], str) or s['image_path'] is None):
+        raise ValueError("Static setting 'image_path' must be a string or null.")
+    if 'opacity' not in s or not isinstance(s['opacity'], (int, float)) or not (0 <= s['opacity'] <= 255):
+        raise ValueError("Static setting 'opacity' must be a number between 0 and 255.")
+    if 'scale' not in s or not isinstance(s['scale'], (int, float)) or s['scale'] <= 0:
+         raise ValueError("Static setting 'scale' must be a positive number.")
+
+    a = data['animated']
+    if 'gif_path' not in a or not (isinstance(a['gif_path'], str) or a['gif_path'] is None):
+        raise ValueError("Animated setting 'gif_path' must be a string or null.")
+    if 'opacity' not in a or not isinstance(a['opacity'], (int, float)) or not (0 <= a['opacity'] <= 255):
+        raise ValueError("Animated setting 'opacity' must be a number between 0 and 255.")
+    if 'scale' not in a or not isinstance(a['scale'], (int, float)) or a['scale'] <= 0:
+         raise ValueError("Animated setting 'scale' must be a positive number.")
+    if 'speed' not in a or not isinstance(a['speed'], (int, float)) or a['speed'] <= 0:
+         raise ValueError("Animated setting 'speed' must be a positive number.")
+
+    return True
+
+def main(number=20000, repeat=9):
+    data = CrosshairSettings().to_dict()
+    body = json.dumps(data)
+    legacy_validate_settings(data) # Both must accept the same document
+    CrosshairSettings.from_dict(data)
+
+    rows = [
+        ("legacy validate_settings(dict)", lambda: legacy_validate_settings(data)),
+        ("CrosshairSettings.from_dict(dict)", lambda: CrosshairSettings.from_dict(data)),
+        ("json.loads + legacy validate_settings", lambda: legacy_validate_settings(json.loads(body))),
+        ("json.loads + CrosshairSettings.from_dict", lambda: CrosshairSettings.from_dict(json.loads(body))),
+    ]
+    # Rows take turns within each round, so a noisy moment on the machine does not favour one of them
+    best = [float('inf')] * len(rows)
+    for _ in range(repeat):
+        for row, (label, func) in enumerate(rows):
+            best[row] = min(best[row], timeit.timeit(func, number=number))
+    for (label, func), seconds in zip(rows, best):
+        print(f"{label:<42} {seconds / number * 1e6:7.2f} us per call")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+from PySide6.QtCore import QObject, QTimer, QElapsedTimer, Qt, Signal, Slot
+from PySide6.QtGui import QImage, QImageReader
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Delay used for frames that don't specify one (matches common browser behaviour)
+DEFAULT_FRAME_DELAY = 100
+# Frames with a delay at or below this are treated as DEFAULT_FRAME_DELAY, like browsers do
+MIN_FRAME_DELAY = 10
+# How long a streaming animation waits before checking again for a frame that is still decoding
+STREAM_WAIT_MS = 10
+
+def iter_animation_frames(path):
+    """Decodes the frames of an image file one at a time.
+
+    Yields:
+        (image, delay, is_last): premultiplied QImage, its delay in ms and
+        whether it is the last frame of the file. Nothing is yielded if the
+        file could not be read.
+    """
+    reader = QImageReader(path)
+    decoded = 0
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay()
+        is_last = not reader.supportsAnimation() or not reader.canRead()
+        decoded += 1
+        yield (image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied),
+               delay if delay > MIN_FRAME_DELAY else DEFAULT_FRAME_DELAY,
+               is_last)
+        if is_last:
+            break
+    if not decoded:
+        logger.warning("Could not decode %s: %s", path, reader.errorString())
+
+class GifAnimation(QObject):
+    """Plays a pre-decoded frame list with one precise timer.
+
+    Frame deadlines are tracked on a monotonic clock, so timer jitter does not
+    accumulate into drift, and speed changes apply to the frame being shown
+    without restarting playback.
+
+    frames may be any indexable sequence of QImages, e.g. a DeltaFrameStore
+    or a FrameStream.
+    An animation created with complete=False is still being decoded: the
+    frame sequence keeps growing, only frames announced through
+    append_frames() are played, and playback holds the last of them until
+    the next one is announced.
+    """
+    frameChanged = Signal(int)
+
+    def __init__(self, frames, delays, parent=None, complete=True):
+        super().__init__(parent)
+        self._frames = frames
+        # One entry per playable frame; read as is when complete (e.g. a FrameStream's thread-safe StreamDelays)
+        self._delays = delays if complete else list(delays)
+        self._complete = complete
+        self._speed = 100 # Percentage
+        self._current = 0
+        self._running = False
+        self._paused_at = None # Clock time playback was paused at, None unless paused
+        self._clock = QElapsedTimer()
+        self._clock.start()
+        self._next_deadline = 0.0 # Clock time (ms) at which the next frame is due
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._advance)
+        self.reset_pacing_stats()
+
+    # --- QMovie-like accessors ---
+    def isValid(self):
+        return bool(self._delays)
+
+    def frameCount(self):
+        return len(self._delays)
+
+    def frames(self):
+        return self._frames
+
+    def currentFrameNumber(self):
+        return self._current
+
+    def currentImage(self):
+        return self._frames[self._current] if self._delays else QImage()
+
+    def speed(self):
+        return self._speed
+
+    def isRunning(self):
+        return self._running
+
+    def isComplete(self):
+        return self._complete
+
+    def append_frames(self, delays):
+        """Makes the next len(delays) frames of the (growing) frame sequence playable."""
+        self._delays.extend(delays)
+
+    def finish_frames(self):
+        """Marks the frame list as complete, so playback loops instead of waiting for more."""
+        self._complete = True
+
+    def _scaled_delay(self, index):
+        return self._delays[index] * 100.0 / self._speed
+
+    # --- Playback control ---
+    def start(self):
+        """Starts (or restarts) playback from the current frame."""
+        if not self._delays:
+            return
+        self._running = True
+        self._paused_at = None
+        self.frameChanged.emit(self._current)
+        if len(self._delays) > 1 or not self._complete:
+            self._next_deadline = self._clock.elapsed() + self._scaled_delay(self._current)
+            self._schedule()
+
+    def stop(self):
+        self._running = False
+        self._paused_at = None
+        self._timer.stop()
+
+    def isPaused(self):
+        return self._paused_at is not None
+
+    def pause(self):
+        """Stops the timer without losing the playback position (e.g. while the overlay is hidden)."""
+        if not self._running or self._paused_at is not None:
+            return
+        self._paused_at = self._clock.elapsed()
+        self._timer.stop()
+
+    def resume(self):
+        """Continues after pause() at the frame that would be showing had playback never stopped.
+
+        Frame sequences that can only be read in order (a FrameStream) and
+        animations still being decoded continue from the paused frame instead.
+        """
+        if self._paused_at is None:
+            return
+        now = self._clock.elapsed()
+        paused_for = now - self._paused_at
+        self._paused_at = None
+        if len(self._delays) < 2:
+            return
+        if not self._complete or hasattr(self._frames, 'is_ready'):
+            self._next_deadline += paused_for # Pick up exactly where playback stopped
+        else:
+            self._catch_up(now)
+        self.frameChanged.emit(self._current)
+        self._schedule()
+
+    def _catch_up(self, now):
+        """Moves to the frame due at clock time now, without showing the ones in between."""
+        if self._next_deadline > now:
+            return
+        loop_ms = sum(self._delays) * 100.0 / self._speed
+        behind = now - self._next_deadline
+        if loop_ms > 0 and behind >= loop_ms:
+            behind %= loop_ms # Skip whole loops at once
+            self._next_deadline = now - behind
+        while self._next_deadline <= now:
+            self._current = (self._current + 1) % len(self._delays)
+            self._next_deadline += self._scaled_delay(self._current)
+
+    def setSpeed(self, speed):
+        """Changes playback speed (percent) without restarting; the current frame's remaining time is rescaled."""
+        speed = max(1, speed)
+        if speed == self._speed:
+            return
+        if self._running and self._paused_at is None and self._timer.isActive():
+            remaining = max(0.0, self._next_deadline - self._clock.elapsed())
+            self._next_deadline = self._clock.elapsed() + remaining * self._speed / speed
+            self._speed = speed
+            self._schedule()
+        else:
+            self._speed = speed
+
+    def _frame_ready(self, index):
+        """Whether a frame can be shown; frame sequences that decode ahead of playback provide is_ready()."""
+        is_ready = getattr(self._frames, 'is_ready', None)
+        return is_ready is None or is_ready(index)
+
+    def _schedule(self):
+        self._timer.start(max(0, round(self._next_deadline - self._clock.elapsed())))
+
+    @Slot()
+    def _advance(self):
+        if not self._running or self._paused_at is not None:
+            return
+        now = self._clock.elapsed()
+        next_frame = self._current + 1
+        if next_frame >= len(self._delays) and self._complete:
+            next_frame = 0
+        if next_frame >= len(self._delays) or not self._frame_ready(next_frame):
+            # Next frame is still being decoded: keep showing this one and check again shortly
+            self._next_deadline = now + STREAM_WAIT_MS
+            self._schedule()
+            return
+        if len(self._delays) < 2:
+            return # Finished streaming a single-frame image: nothing to animate
+        self._record_pacing(now)
+        self._current = next_frame
+        self._next_deadline += self._scaled_delay(self._current)
+        if self._next_deadline < now: # Fell far behind (e.g. system stall): resync instead of bursting
+            self._next_deadline = now + self._scaled_delay(self._current)
+        self.frameChanged.emit(self._current)
+        self._schedule()
+
+    # --- Pacing statistics ---
+    def reset_pacing_stats(self):
+        self._frames_shown = 0
+        self._total_error_ms = 0.0
+        self._max_late_ms = 0.0
+
+    def _record_pacing(self, now):
+        error = now - self._next_deadline # > 0 means the frame switched late
+        self._frames_shown += 1
+        self._total_error_ms += abs(error)
+        self._max_late_ms = max(self._max_late_ms, error)
+
+    def pacing_stats(self):
+        """Returns how closely actual frame switches matched their scheduled times."""
+        shown = self._frames_shown
+        return {
+            'frames_shown': shown,
+            'mean_error_ms': round(self._total_error_ms / shown, 2) if shown else 0.0,
+            'max_late_ms': round(self._max_late_ms, 2),
+            'speed': self._speed,
+            'frame_count': len(self._delays),
+        }
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from frame_store import decode_frame_store
+
+# Default memory budget for decoded crosshair images
+DEFAULT_BUDGET_MB = 128
+
+def asset_key(path):
+    """Returns the cache key of a file: (absolute path, mtime_ns, size). Raises OSError if it is missing."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+class DecodedAsset:
+    """Decoded frames of one image file (a single frame for static images).
+
+    frames is a DeltaFrameStore, or any sequence of QImages.
+    """
+    __slots__ = ('path', 'frames', 'delays', 'nbytes')
+
+    def __init__(self, path, frames, delays):
+        self.path = path
+        self.frames = frames
+        self.delays = delays
+        self.nbytes = getattr(frames, 'nbytes', None)
+        if self.nbytes is None:
+            self.nbytes = sum(frame.sizeInBytes() for frame in frames)
+
+    def is_valid(self):
+        return len(self.frames) > 0
+
+class DecodedAssetCache:
+    """Process-wide LRU cache of decoded crosshair images with a byte budget.
+
+    Entries are keyed by (path, mtime, size), so replacing a file on disk
+    never returns stale frames. The least recently used assets are evicted
+    once the total decoded size exceeds the budget.
+    """
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> DecodedAsset, oldest first
+        self._budget = budget_bytes
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def set_budget(self, budget_bytes):
+        with self._lock:
+            self._budget = budget_bytes
+            self._evict_nolock()
+
+    def get(self, path):
+        """Returns the cached asset for a file, or None."""
+        try:
+            key = asset_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+            return asset
+
+    def load(self, path):
+        """Returns the decoded asset for a file, decoding (and caching) it on a miss."""
+        asset = self.get(path)
+        if asset is not None:
+            return asset
+        frames, delays = decode_frame_store(path)
+        asset = DecodedAsset(path, frames, delays)
+        if asset.is_valid():
+            self.put(path, asset)
+        return asset
+
+    def put(self, path, asset):
+        try:
+            key = asset_key(path)
+        except OSError:
+            return
+        with self._lock:
+            if asset.nbytes > self._budget:
+                return # Would evict everything else; the caller still gets the asset
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.nbytes
+            self._entries[key] = asset
+            self._total_bytes += asset.nbytes
+            self._evict_nolock()
+
+    def _evict_nolock(self):
+        while self._total_bytes > self._budget and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'budget_bytes': self._budget,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+            }
+
+_asset_cache = DecodedAssetCache()
+
+def get_asset_cache():
+    """Returns the process-wide decoded asset cache."""
+    return _asset_cache
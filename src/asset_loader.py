@@ -0,0 +1,56 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+from animation import iter_animation_frames
+from asset_cache import get_asset_cache, DecodedAsset
+from frame_store import DeltaFrameStore
+
+# After the first frame, decoded frames are handed to the GUI thread in batches of this size
+STREAM_CHUNK_FRAMES = 8
+
+class AssetLoaderSignals(QObject):
+    # (token, DeltaFrameStore, [delay_ms]) - the store is shared and keeps growing, the
+    # delays are those of the frames added since the previous emit (first emit: first frame only)
+    frames_ready = Signal(int, object, object)
+    # (token, number of frames decoded) - always emitted last, also after cancel()
+    finished = Signal(int, int)
+
+class AssetLoader(QRunnable):
+    """Decodes an image or GIF off the GUI thread, streaming frames as they are decoded.
+
+    A fully decoded file is also stored in the shared asset cache.
+    """
+    def __init__(self, token, path, max_frames=None):
+        super().__init__()
+        self.token = token
+        self.path = path
+        self.max_frames = max_frames # e.g. 1 for a static image; partial decodes are not cached
+        self.signals = AssetLoaderSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        """Stops decoding at the next frame (the result is no longer needed)."""
+        self._cancelled = True
+
+    def run(self):
+        frames = DeltaFrameStore()
+        delays = []
+        sent = 0
+        complete = False
+        for image, delay, is_last in iter_animation_frames(self.path):
+            if self._cancelled:
+                break
+            frames.append(image)
+            delays.append(delay)
+            if sent == 0 or len(frames) - sent >= STREAM_CHUNK_FRAMES:
+                self.signals.frames_ready.emit(self.token, frames, delays[sent:])
+                sent = len(frames)
+            if is_last:
+                complete = True
+            elif self.max_frames and len(frames) >= self.max_frames:
+                break
+        frames.finish()
+        if not self._cancelled:
+            if len(frames) > sent:
+                self.signals.frames_ready.emit(self.token, frames, delays[sent:])
+            if complete:
+                get_asset_cache().put(self.path, DecodedAsset(self.path, frames, delays))
+        self.signals.finished.emit(self.token, len(frames))
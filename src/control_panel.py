@@ -8,6 +8,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QSettings
 from PySide6.QtGui import QFont, QIcon, QPixmap, QColor, QPalette
+from log import get_logger
+
+logger = get_logger(__name__)
 
 class CustomGroupBox(QGroupBox):
     """Custom QGroupBox with better title styling"""
@@ -71,7 +74,7 @@ class ControlPanelWindow(QWidget):
                         return url
                 
                 # If we're here, it's likely a public IP or VPN IP we want to exclude
-                print(f"Network URL contains potential VPN or non-local IP: {host_part}")
+                logger.info("Network URL contains potential VPN or non-local IP: %s", host_part)
                 return None
                 
             except ValueError:
@@ -79,7 +82,7 @@ class ControlPanelWindow(QWidget):
                 return None
                 
         except Exception as e:
-            print(f"Error validating network URL: {e}")
+            logger.error("Error validating network URL: %s", e)
             return None
             
         return url
@@ -511,7 +514,7 @@ class ControlPanelWindow(QWidget):
         """Override close event to just hide the window instead of closing."""
         event.ignore() # Don't accept the close event
         self.hide()    # Hide the window
-        print("Control Panel hidden. Can be reopened from tray menu.")
+        logger.info("Control Panel hidden. Can be reopened from tray menu.")
 
 # Example Usage (for testing this window directly)
 if __name__ == '__main__':
@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageChops
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QPainter
+from animation import iter_animation_frames
+
+# A full frame is kept at least every this many frames, bounding the cost of random access
+KEYFRAME_INTERVAL = 64
+# Frames whose changed area covers at least this share of the canvas are stored whole
+KEYFRAME_AREA_RATIO = 0.5
+# Number of recently composited frames kept ready for drawing
+RING_SIZE = 3
+
+def _as_pil(image):
+    """Wraps a 32-bit QImage's pixels as a PIL image without copying them."""
+    return Image.frombuffer('RGBA', (image.width(), image.height()), image.constBits(),
+                            'raw', 'RGBA', image.bytesPerLine(), 1)
+
+def changed_rect(previous, current):
+    """Returns the QRect covering every pixel that differs between two same-sized frames (None if equal)."""
+    diff = ImageChops.difference(_as_pil(previous), _as_pil(current))
+    try:
+        bbox = diff.getbbox(alpha_only=False)
+    except TypeError: # Pillow < 10.2: getbbox() on RGBA only looks at alpha, fold the channels together
+        c0, c1, c2, c3 = diff.split()
+        bbox = ImageChops.lighter(ImageChops.lighter(c0, c1), ImageChops.lighter(c2, c3)).getbbox()
+    if not bbox:
+        return None
+    left, top, right, bottom = bbox
+    return QRect(left, top, right - left, bottom - top)
+
+class DeltaFrameStore:
+    """Frames of an animation stored as keyframes plus the changed rectangle of every other frame.
+
+    Frames are appended fully composited (the decoder has already applied
+    the GIF disposal methods), so each delta is taken against the frame that
+    was actually shown before it and replaying deltas reproduces every
+    disposal mode exactly. Frames are composited back on demand; the last
+    few results are kept in a small ring so sequential playback applies one
+    patch per frame.
+
+    Appending (from a decoder thread) and reading (from the GUI thread) may
+    happen at the same time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keyframes = {} # frame index -> full QImage
+        self._patches = [] # per frame: None for keyframes and unchanged frames, else (QPoint, QImage)
+        self._base = [] # per frame: index of the keyframe its patches apply on top of
+        self._ring = OrderedDict() # frame index -> composited QImage, oldest first
+        self._previous = None # Last appended frame, only kept while appending
+        self._stored_bytes = 0
+        self._frame_bytes = 0 # Size of one full frame
+
+    def __len__(self):
+        return len(self._base)
+
+    def __getitem__(self, index):
+        """Returns frame index fully composited (do not modify the returned image)."""
+        with self._lock:
+            if index < 0:
+                index += len(self._base)
+            if not 0 <= index < len(self._base):
+                raise IndexError(index)
+            image = self._ring.get(index)
+            if image is not None:
+                self._ring.move_to_end(index)
+                return image
+            image = self._composite_nolock(index)
+            self._ring[index] = image
+            while len(self._ring) > RING_SIZE:
+                self._ring.popitem(last=False)
+            return image
+
+    def append(self, image):
+        """Adds the next fully composited frame."""
+        previous = self._previous
+        rect = None
+        keyframe = (previous is None or previous.size() != image.size()
+                    or len(self._base) - self._base[-1] >= KEYFRAME_INTERVAL)
+        if not keyframe:
+            rect = changed_rect(previous, image)
+            if rect is not None:
+                keyframe = rect.width() * rect.height() >= KEYFRAME_AREA_RATIO * image.width() * image.height()
+        with self._lock:
+            if keyframe:
+                self._keyframes[len(self._base)] = image
+                self._patches.append(None)
+                self._base.append(len(self._base))
+                self._stored_bytes += image.sizeInBytes()
+                self._frame_bytes = image.sizeInBytes()
+            else:
+                patch = image.copy(rect) if rect is not None else None # Unchanged frame: no patch at all
+                self._patches.append((rect.topLeft(), patch) if patch is not None else None)
+                self._base.append(self._base[-1])
+                if patch is not None:
+                    self._stored_bytes += patch.sizeInBytes()
+        self._previous = image
+
+    def frame_dirty_rect(self, index):
+        """Returns the area of a frame that differs from the frame before it (None if nothing changed).
+
+        Keyframes report their whole area.
+        """
+        with self._lock:
+            if self._base[index] == index:
+                return self._keyframes[index].rect()
+            entry = self._patches[index]
+            return QRect(entry[0], entry[1].size()) if entry is not None else None
+
+    def finish(self):
+        """Called once all frames are appended; releases the frame kept for diffing."""
+        self._previous = None
+
+    def _composite_nolock(self, index):
+        base = self._base[index]
+        # Continue from the closest already composited frame after the keyframe, if any
+        start = max((i for i in self._ring if base <= i < index), default=None)
+        if start is None:
+            if index == base:
+                return self._keyframes[base]
+            start = base
+            canvas = self._keyframes[base].copy()
+        else:
+            canvas = self._ring[start].copy()
+        self._apply_patches(canvas, start + 1, index + 1)
+        return canvas
+
+    def _apply_patches(self, canvas, first, stop):
+        painter = None
+        for i in range(first, stop):
+            entry = self._patches[i]
+            if entry is None:
+                continue
+            if painter is None:
+                painter = QPainter(canvas)
+                painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source) # Replace, alpha included
+            painter.drawImage(entry[0], entry[1])
+        if painter is not None:
+            painter.end()
+
+    def iter_frames(self):
+        """Yields (index, QImage) for every frame currently stored, compositing sequentially.
+
+        Uses its own canvas, so walking all frames (e.g. to prepare them in a
+        worker thread) does not disturb the ring used for playback.
+        """
+        canvas = None
+        for index in range(len(self)):
+            with self._lock:
+                if index == self._base[index]:
+                    canvas = self._keyframes[index]
+                elif self._patches[index] is not None:
+                    canvas = canvas.copy() # The previous frame may still be in use by the caller
+                    self._apply_patches(canvas, index, index + 1)
+            yield index, canvas
+
+    @property
+    def nbytes(self):
+        """Bytes held by keyframes and patches (the ring buffer is not included)."""
+        with self._lock:
+            return self._stored_bytes
+
+    def memory_stats(self):
+        with self._lock:
+            ring_bytes = sum(image.sizeInBytes() for index, image in self._ring.items()
+                             if index not in self._keyframes)
+            return {
+                'frames': len(self._base),
+                'keyframes': len(self._keyframes),
+                'stored_bytes': self._stored_bytes,
+                'ring_bytes': ring_bytes,
+                'full_frames_bytes': self._frame_bytes * len(self._base), # What storing every frame would cost
+            }
+
+def decode_frame_store(path):
+    """Decodes an image file into a DeltaFrameStore.
+
+    Returns:
+        (store, delays): store is empty if the file could not be read.
+    """
+    store = DeltaFrameStore()
+    delays = []
+    for image, delay, _ in iter_animation_frames(path):
+        store.append(image)
+        delays.append(delay)
+    store.finish()
+    return store, delays
@@ -0,0 +1,140 @@
+import threading
+from collections import deque
+from collections.abc import Sequence
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QImage, QImageReader
+from animation import iter_animation_frames, DEFAULT_FRAME_DELAY
+
+# Decoded frames kept in memory while streaming, including the one being shown
+STREAM_BUFFER_FRAMES = 8
+
+def probe_animation(path):
+    """Reads an image header and returns (frame_count, estimated bytes of all decoded frames).
+
+    frame_count is 0 if the format does not report it.
+    """
+    reader = QImageReader(path)
+    size = reader.size()
+    count = max(0, reader.imageCount())
+    if not size.isValid():
+        return count, 0
+    return count, size.width() * size.height() * 4 * max(1, count)
+
+class StreamDelays(Sequence):
+    """Read-only view of a FrameStream's frame delays, for GifAnimation to play from.
+
+    The decoder thread fills in the real delays during the first loop, and
+    drops frames the header over-reported, so every read takes the
+    stream's lock. Indexes past a dropped tail read as DEFAULT_FRAME_DELAY.
+    """
+    __slots__ = ('_stream',)
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __len__(self):
+        return len(self._stream)
+
+    def __getitem__(self, index):
+        with self._stream._cond:
+            delays = self._stream._delays
+            return delays[index] if index < len(delays) else DEFAULT_FRAME_DELAY
+
+    def __iter__(self):
+        with self._stream._cond:
+            return iter(tuple(self._stream._delays))
+
+class FrameStreamSignals(QObject):
+    # (token, whether the first frame could be decoded) - emitted once
+    ready = Signal(int, bool)
+
+class FrameStream:
+    """Plays a GIF from a fixed-size ring buffer that a decoder thread keeps filled just ahead of playback.
+
+    Only STREAM_BUFFER_FRAMES frames are ever decoded at the same time; the
+    file is decoded again on every loop. Behaves like the frame sequence
+    GifAnimation expects: frames must be requested in playback order, and
+    is_ready() tells whether the next one has been decoded yet.
+    """
+    def __init__(self, token, path, frame_count, buffer_frames=STREAM_BUFFER_FRAMES):
+        self.token = token
+        self.path = path
+        self._delays = [DEFAULT_FRAME_DELAY] * frame_count # Filled in as frames are decoded (guarded by _cond)
+        self.delays = StreamDelays(self)
+        self.signals = FrameStreamSignals()
+        self._capacity = max(2, buffer_frames)
+        self._buffer = deque() # (frame index, QImage) in playback order, the shown frame first
+        self._shown = QImage() # Last frame handed out, kept while the next one is decoding
+        self._cond = threading.Condition()
+        self._closed = False
+        self._loops = 0
+        self._thread = threading.Thread(target=self._decode_loop, name='frame-stream', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        """Stops the decoder thread (the stream can't be restarted)."""
+        with self._cond:
+            self._closed = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    # Kept for symmetry with AssetLoader, so pending loads can be cancelled the same way
+    cancel = close
+
+    def __len__(self):
+        with self._cond:
+            return len(self._delays)
+
+    def is_ready(self, index):
+        with self._cond:
+            return any(i == index for i, _ in self._buffer)
+
+    def __getitem__(self, index):
+        """Returns frame index and releases the frames before it, or the last frame if index isn't decoded yet."""
+        with self._cond:
+            if any(i == index for i, _ in self._buffer):
+                while self._buffer[0][0] != index:
+                    self._buffer.popleft()
+                self._shown = self._buffer[0][1]
+                self._cond.notify_all() # Room for the decoder again
+            return self._shown
+
+    def _decode_loop(self):
+        announced = False
+        while True:
+            decoded = 0
+            for image, delay, _ in iter_animation_frames(self.path):
+                if decoded >= len(self):
+                    break # More frames than the header reported; play the announced ones
+                with self._cond:
+                    while len(self._buffer) >= self._capacity and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        break
+                    self._delays[decoded] = delay
+                    self._buffer.append((decoded, image))
+                decoded += 1
+                if not announced:
+                    announced = True
+                    self.signals.ready.emit(self.token, True)
+            with self._cond:
+                if self._closed or not decoded:
+                    break
+                if decoded < len(self._delays):
+                    del self._delays[decoded:] # Fewer frames than the header reported
+                self._loops += 1
+        if not announced:
+            self.signals.ready.emit(self.token, False)
+
+    def memory_stats(self):
+        with self._cond:
+            frame = self._buffer[0][1] if self._buffer else self._shown
+            return {
+                'frames': len(self._delays),
+                'buffered_frames': len(self._buffer),
+                'buffer_bytes': sum(image.sizeInBytes() for _, image in self._buffer),
+                'full_frames_bytes': frame.sizeInBytes() * len(self._delays), # What keeping every frame would cost
+                'loops_decoded': self._loops,
+            }
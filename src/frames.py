@@ -0,0 +1,49 @@
+from PySide6.QtCore import QObject, QRunnable, Qt, Signal
+from PySide6.QtGui import QImage, QPainter
+
+def prepare_frame(image, scale, opacity):
+    """Returns a copy of a frame at its final on-screen size and opacity.
+
+    The result is premultiplied ARGB, so drawing it is a plain unscaled blit.
+    Safe to call from worker threads (QImage only).
+
+    Args:
+        image: source QImage
+        scale: size factor (1.0 = original size)
+        opacity: 0-255
+    """
+    w = max(1, int(image.width() * scale))
+    h = max(1, int(image.height() * scale))
+    if (w, h) != (image.width(), image.height()):
+        source = image.scaled(w, h, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    else:
+        source = image
+    if opacity >= 255:
+        return source.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+
+    result = QImage(w, h, QImage.Format.Format_ARGB32_Premultiplied)
+    result.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(result)
+    painter.setOpacity(max(0, opacity) / 255.0)
+    painter.drawImage(0, 0, source)
+    painter.end()
+    return result
+
+class FrameTableSignals(QObject):
+    # (token, {frame_index: QImage}) - token identifies the request the table was built for
+    finished = Signal(int, object)
+
+class FrameTableBuilder(QRunnable):
+    """Builds a table of prepared frames off the GUI thread."""
+    def __init__(self, token, source_frames, scale, opacity):
+        super().__init__()
+        self.token = token
+        self.source_frames = source_frames # iterable of (frame_index, QImage), consumed in run()
+        self.scale = scale
+        self.opacity = opacity
+        self.signals = FrameTableSignals()
+
+    def run(self):
+        table = {index: prepare_frame(image, self.scale, self.opacity)
+                 for index, image in self.source_frames}
+        self.signals.finished.emit(self.token, table)
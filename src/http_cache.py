@@ -0,0 +1,55 @@
+import os
+import threading
+from flask import send_file
+
+# Files at content-addressed URLs (e.g. sprite sheets) never change, so browsers may keep them for a year
+PRESET_MAX_AGE = 365 * 24 * 3600
+
+def make_etag(size, mtime_ns):
+    """Builds a strong validator from a file's size and modification time (no content hashing)."""
+    return f"{size:x}-{mtime_ns:x}"
+
+class FileValidatorIndex:
+    """Keeps the ETag and Last-Modified values of served files.
+
+    Entries are re-derived only when a file's (size, mtime) changes, so a
+    request costs one stat() instead of reading or hashing the file.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {} # path -> (size, mtime_ns, etag)
+
+    def get(self, path):
+        """Returns (etag, mtime_seconds) for a file. Raises OSError if it is missing."""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+                entry = (stat.st_size, stat.st_mtime_ns, make_etag(stat.st_size, stat.st_mtime_ns))
+                self._entries[path] = entry
+        return entry[2], stat.st_mtime_ns / 1e9
+
+def send_cached_file(path, etag, mtime, mimetype=None, immutable=False, max_age=0):
+    """Sends a file with ETag/Last-Modified validators and answers conditional requests with 304.
+
+    Immutable files get a one-year public max-age and files at versioned
+    URLs the given public max_age. Everything else must be revalidated
+    (cheap, since a matching If-None-Match returns an empty 304).
+    """
+    if immutable:
+        max_age = PRESET_MAX_AGE
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        etag=etag,
+        last_modified=mtime,
+        max_age=max_age,
+        conditional=True
+    )
+    if immutable:
+        response.cache_control.immutable = True
+    if max_age:
+        response.cache_control.public = True
+    else:
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,69 @@
+import logging
+import sys
+import threading
+import time
+
+# Parent of every logger in the app; per-module loggers are children of it
+ROOT_LOGGER_NAME = 'crosshair'
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+DEFAULT_LEVEL = 'INFO'
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+_root = logging.getLogger(ROOT_LOGGER_NAME)
+
+def setup_logging(level=DEFAULT_LEVEL):
+    """Sends all app loggers to stderr. Safe to call more than once."""
+    if not _root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt='%H:%M:%S'))
+        _root.addHandler(handler)
+        _root.propagate = False # Don't duplicate through a root handler (e.g. Flask/werkzeug's)
+    set_level(level)
+
+def get_logger(name):
+    """Returns the logger of a module, e.g. get_logger('overlay') -> 'crosshair.overlay'."""
+    return _root.getChild(name)
+
+def set_level(level):
+    """Changes the level of every app logger at runtime. Raises ValueError for unknown levels."""
+    level = str(level).upper()
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level '{level}'. Must be one of {LEVELS}.")
+    _root.setLevel(level)
+
+def get_level():
+    return logging.getLevelName(_root.getEffectiveLevel())
+
+class RateLimitFilter(logging.Filter):
+    """Lets each distinct message (by call site) through at most once per interval.
+
+    The next message that gets through reports how many were suppressed in
+    between. Attach it to the logger of per-frame messages: the filter only
+    runs for records whose level is enabled, so a disabled debug call still
+    costs just the isEnabledFor() check.
+    """
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last = {} # (pathname, lineno) -> (time last emitted, suppressed since)
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            last_time, suppressed = self._last.get(key, (None, 0))
+            if last_time is not None and now - last_time < self.interval:
+                self._last[key] = (last_time, suppressed + 1)
+                return False
+            self._last[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+def get_rate_limited_logger(name, interval=1.0):
+    """Returns a child logger of name whose messages are rate limited (for per-frame/per-request messages)."""
+    logger = get_logger(name).getChild('hot')
+    if not any(isinstance(f, RateLimitFilter) for f in logger.filters):
+        logger.addFilter(RateLimitFilter(interval))
+    return logger
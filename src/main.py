@@ -1,26 +1,31 @@
 import sys
 import threading
-import json
 import webbrowser
 import socket
 import os
 import subprocess
+import multiprocessing
 from pathlib import Path
-from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QMessageBox
-from PySide6.QtGui import QIcon, QAction, QPixmap
-from PySide6.QtCore import QTimer, QSize
+from log import get_logger, setup_logging, set_level
 
-# Import necessary components (adjust paths/imports as needed)
-from overlay import OverlayWidget
-from server import start_server 
-from state import StateManager 
-from control_panel import ControlPanelWindow 
+if __name__ == "__main__":
+    # The preset scanner's worker processes run this module too: spawned ones import it as
+    # __mp_main__, and in frozen builds they exit inside freeze_support(). Either way they
+    # never get to the GUI and server imports below.
+    multiprocessing.freeze_support()
+    from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QMessageBox
+    from PySide6.QtGui import QIcon, QAction, QPixmap
+    from PySide6.QtCore import QTimer, QSize
 
-# --- Configuration ---
-# Size of the overlay window (can be adjusted)
-OVERLAY_WIDTH = 200
-OVERLAY_HEIGHT = 200
+    # Import necessary components (adjust paths/imports as needed)
+    from overlay import OverlayWidget
+    from server import start_server
+    from state import StateManager
+    from control_panel import ControlPanelWindow
+
+logger = get_logger(__name__)
 
+# --- Configuration ---
 # Flask server configuration (adjust as needed)
 FLASK_HOST = '0.0.0.0' # Listen on all network interfaces
 FLASK_PORT = 5000
@@ -47,7 +52,7 @@ def get_local_ip():
         s.connect(('10.255.255.255', 1)) 
         IP = s.getsockname()[0]
     except Exception as e:
-        print(f"Warning: Could not determine local network IP: {e}")
+        logger.warning("Could not determine local network IP: %s", e)
         IP = None
     finally:
         if s: s.close()
@@ -154,7 +159,7 @@ def handle_tray_activation(reason):
 
 def open_web_ui():
     """Opens the local web configuration interface in the default browser."""
-    print(f"Opening web UI: {LOCAL_WEB_UI_URL}")
+    logger.info("Opening web UI: %s", LOCAL_WEB_UI_URL)
     webbrowser.open(LOCAL_WEB_UI_URL)
 
 def toggle_crosshair_visibility():
@@ -193,13 +198,13 @@ def check_firewall_status(port):
         if result.returncode == 0:
             output = result.stdout
             if "State                                 ON" in output:
-                print("Windows Firewall is enabled. May need to add an exception.")
+                logger.info("Windows Firewall is enabled. May need to add an exception.")
                 return True
         
         # Firewall is either off or we couldn't determine the status
         return False
     except Exception as e:
-        print(f"Error checking firewall status: {e}")
+        logger.error("Error checking firewall status: %s", e)
         return False
 
 def copy_to_clipboard(text):
@@ -217,6 +222,7 @@ def copy_to_clipboard(text):
 
 def main():
     global _tray_icon, _tray_menu, _control_panel, _overlay_widget, _app
+    setup_logging() # Default level until the app config is loaded
     _app = QApplication(sys.argv)
     _app.setQuitOnLastWindowClosed(False)  # Prevent app from exiting when windows are closed
     
@@ -232,7 +238,7 @@ def main():
     # Create all required directories
     for directory in [resources_dir, profiles_dir, uploads_dir]:
         os.makedirs(directory, exist_ok=True)
-        print(f"Created directory: {directory}")
+        logger.debug("Created directory: %s", directory)
     
     # Determine Network IP for remote access
     network_ip = get_local_ip()
@@ -240,16 +246,18 @@ def main():
 
     # Initialize shared state
     state_manager = StateManager(user_data_dir)
-    initial_settings = state_manager.get_settings()
+    _app.aboutToQuit.connect(state_manager.flush) # Write pending settings/config changes before exiting
+    try:
+        set_level(state_manager.get_app_config().get('log_level'))
+    except ValueError as e:
+        logger.warning("%s Keeping the default level.", e)
+    initial_revision, initial_settings = state_manager.get_settings_revision()
 
     # Create the overlay widget
-    _overlay_widget = OverlayWidget(state_manager)
-    _overlay_widget.resize(OVERLAY_WIDTH, OVERLAY_HEIGHT)
-    _overlay_widget.center_on_screen()
+    _overlay_widget = OverlayWidget(state_manager) # Sizes itself to the crosshair
     
-    # Convert initial settings to JSON string before passing
-    initial_settings_json = json.dumps(initial_settings)
-    _overlay_widget.update_crosshair(initial_settings_json) # Set initial state via JSON
+    _overlay_widget.prewarm(initial_settings) # Decode the restored crosshair's image before the first paint
+    _overlay_widget.apply_settings_revision(initial_revision) # Reads the initial settings from the state manager
     
     _overlay_widget.show()
 
@@ -263,7 +271,7 @@ def main():
 
     # Set up system tray if available
     if QSystemTrayIcon.isSystemTrayAvailable():
-        print("System tray available, creating icon...")
+        logger.debug("System tray available, creating icon...")
         _tray_icon = create_tray_icon(_app, network_web_ui_url)
         _tray_icon.show()
         
@@ -275,23 +283,23 @@ def main():
             3000  # Show for 3 seconds
         )
         
-        print("Tray icon created and shown.")
+        logger.debug("Tray icon created and shown.")
     else:
-        print("Warning: System tray not available on this system.")
+        logger.warning("System tray not available on this system.")
 
     # Start Flask Server in a Background Thread
     server_thread = threading.Thread(
         target=start_server, 
-        args=(_control_panel, state_manager, _overlay_widget.update_crosshair, FLASK_PORT, user_data_dir, FLASK_HOST),
+        args=(_control_panel, state_manager, _overlay_widget.post_settings_revision, FLASK_PORT, user_data_dir, FLASK_HOST, _overlay_widget),
         daemon=True
     )
     server_thread.start()
-    print(f"Flask server started in background thread on {FLASK_HOST}:{FLASK_PORT}")
-    print(f"Web UI available at: {LOCAL_WEB_UI_URL}")
+    logger.info("Flask server started in background thread on %s:%s", FLASK_HOST, FLASK_PORT)
+    logger.info("Web UI available at: %s", LOCAL_WEB_UI_URL)
     
     # Check if network access is available
     if network_web_ui_url:
-        print(f"Network access: {network_web_ui_url}")
+        logger.info("Network access: %s", network_web_ui_url)
         
         # Check for Windows Firewall
         if check_firewall_status(FLASK_PORT):
@@ -311,10 +319,10 @@ def main():
                 firewall_message
             ))
     else:
-        print("Network access: Not available (couldn't determine local IP)")
+        logger.info("Network access: Not available (couldn't determine local IP)")
 
     # Start the Qt application event loop
-    print("Starting Qt event loop...")
+    logger.debug("Starting Qt event loop...")
     sys.exit(_app.exec())
 
 if __name__ == "__main__":
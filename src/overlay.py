@@ -1,17 +1,112 @@
 import sys
+import math
+import time
+import threading
+from collections import deque
 import os # Added os
 import json # Added json
 from PySide6.QtWidgets import QWidget, QApplication
-from PySide6.QtCore import Qt, Signal, QPoint, QRectF, QRect, Slot, QSize, QTimer # Added QTimer
-from PySide6.QtGui import QPainter, QColor, QPen, QPixmap, QMovie, QCursor, QMouseEvent, QKeyEvent # Added QCursor, QMouseEvent, QKeyEvent
+from PySide6.QtCore import Qt, Signal, QPoint, QRectF, QRect, Slot, QSize, QTimer, QThreadPool, QElapsedTimer, QEvent, QMetaObject, QThread # Added QTimer
+from PySide6.QtGui import QPainter, QColor, QPen, QPixmap, QImage, QCursor, QMouseEvent, QKeyEvent # Added QCursor, QMouseEvent, QKeyEvent
+from frames import FrameTableBuilder
+from animation import GifAnimation
+from asset_cache import get_asset_cache, asset_key, DEFAULT_BUDGET_MB
+from asset_loader import AssetLoader
+from frame_stream import FrameStream, probe_animation
+from settings_model import CrosshairSettings, SettingsError
+from update_mailbox import LatestValueMailbox
+from log import get_logger, get_rate_limited_logger
+
+logger = get_logger(__name__)
+hot_logger = get_rate_limited_logger(__name__) # Per-frame and per-key-press messages
 
 # Amount to move the overlay per key press
 NUDGE_AMOUNT = 1
+# The window is fitted to the crosshair plus this margin (antialiasing, bounding box)
+FIT_MARGIN = 2
+# Smallest window size, so an empty or tiny crosshair can still be dragged
+MIN_OVERLAY_SIZE = 16
+# Size of the fixed window older versions saved overlay_x/overlay_y (its top-left corner) for
+LEGACY_OVERLAY_SIZE = 200
+
+# 'auto' playback streams GIFs whose frames would decode to more than this (overridable in config.json)
+DEFAULT_STREAM_THRESHOLD_MB = 256
+# At startup, the saved crosshair's file is decoded before the first paint if its frames stay below this
+PREWARM_MAX_MB = 32
+
+# Default cap on animation repaints per second; 0 matches the display refresh rate
+DEFAULT_MAX_FPS = 0
+# Refresh rate assumed when the display doesn't report one
+FALLBACK_REFRESH_RATE = 60.0
+
+# Longest collect_playback_stats() waits for the GUI thread, in seconds
+STATS_TIMEOUT = 2.0
+
+# Animated frames are only pre-scaled into a frame table if it stays below this size
+FRAME_TABLE_MAX_BYTES = 64 * 1024 * 1024
+
+# Kinds of settings changes, from cheapest to most expensive to apply
+CHANGE_COSMETIC = 'cosmetic' # Opacity: repaint (and re-prepare animated frames)
+CHANGE_PARAMETRIC = 'parametric' # Parametric look: re-rasterize the cached crosshair
+CHANGE_SCALE = 'scale' # Image size: repaint (and re-prepare animated frames)
+CHANGE_SPEED = 'speed' # GIF speed: retime the running animation
+CHANGE_ASSET = 'asset' # image_path/gif_path: load a different file
+CHANGE_TYPE = 'type' # Crosshair type: switch which resource is loaded
+
+def diff_settings(old, new):
+    """Classifies what changed between two settings dicts.
+
+    Returns:
+        set of CHANGE_* values (empty if nothing relevant changed)
+    """
+    changes = set()
+    old = old or {}
+    if old.get('type') != new.get('type'):
+        changes.add(CHANGE_TYPE)
+    if old.get('parametric') != new.get('parametric'):
+        changes.add(CHANGE_PARAMETRIC)
+    for section, path_key in (('static', 'image_path'), ('animated', 'gif_path')):
+        old_section = old.get(section) or {}
+        new_section = new.get(section) or {}
+        if old_section.get(path_key) != new_section.get(path_key):
+            changes.add(CHANGE_ASSET)
+        if old_section.get('scale') != new_section.get('scale'):
+            changes.add(CHANGE_SCALE)
+        if old_section.get('opacity') != new_section.get('opacity'):
+            changes.add(CHANGE_COSMETIC)
+    if (old.get('animated') or {}).get('speed') != (new.get('animated') or {}).get('speed'):
+        changes.add(CHANGE_SPEED)
+    return changes
+
+def parametric_extent(params):
+    """Returns how far (in px) a parametric crosshair reaches from its center in any direction."""
+    extent = 0.0
+    dot_size = params.get('center_dot_size', 0) if params.get('center_dot_enabled') else 0
+    if params.get('center_dot_enabled'):
+        extent = dot_size # drawEllipse radius
+    if params.get('inner_lines_enabled'):
+        gap = max(0, params.get('inner_lines_gap', 3) + dot_size)
+        reach = gap + params.get('inner_lines_length', 5) + params.get('inner_lines_thickness', 1) / 2
+        if params.get('outline_enabled') and params.get('outline_thickness', 1) > 0:
+            outline = params.get('outline_thickness', 1)
+            reach = max(reach, gap + params.get('inner_lines_length', 5) + outline + (outline * 2 + 1) / 2) # Square cap
+        extent = max(extent, reach)
+    return extent
+
+def _source_key(path):
+    """Identifies the file version a resource was loaded from (None if there is no file)."""
+    if not path:
+        return None
+    try:
+        return asset_key(path)
+    except OSError:
+        return (path, None, None) # Missing file: remember the name so it is not retried on every update
 
 class OverlayWidget(QWidget):
     # Signal to indicate settings have changed and repaint is needed
     settings_updated = Signal()
     position_changed = Signal(int, int) # Signal emitted when position is changed by user
+    _stats_requested = Signal(object) # {'event': threading.Event, 'stats': None}, from collect_playback_stats()
 
     def __init__(self, state_manager):
         super().__init__()
@@ -36,31 +131,95 @@ class OverlayWidget(QWidget):
         
         # Load initial state
         self.settings = {} # Will be loaded via update_crosshair
+        self._display_settings = {} # Settings being drawn; lag behind self.settings while an asset loads
+        self._settings_revision = -1 # StateManager revision self.settings was read from
         self.static_pixmap = None
-        self.animated_movie = None
+        self.animation = None # GifAnimation of the current animated crosshair
+        self._loaded_resource = (None, None) # (kind, asset key) of the displayed image/GIF
+        self._pending_load = None # (token, kind, asset key) of a load waiting for its first frame
+        self._stream_token = None # token of the loader still streaming frames into self.animation
+        self._asset_loaders = {} # token -> running AssetLoader
+        self._next_load_token = 0
+        self._center = None # Global position of the crosshair center; the window is fitted around it
+        self._parametric_pixmap = None # Pre-rendered parametric crosshair
+        self._parametric_pixmap_key = None # (params hash, devicePixelRatio, width, height) it was rendered for
+        self._parametric_params_key = None
+        self._frame_table = {} # frame number -> QImage prepared at final scale/opacity
+        self._frame_table_params = None # (scale, opacity) the frame table was built for
+        self._frame_table_token = 0
+        self._frame_table_builders = {} # token -> running FrameTableBuilder
         self._load_initial_position()
+        app_config = self.state_manager.get_app_config()
+        budget_mb = app_config.get('asset_cache_mb') or DEFAULT_BUDGET_MB
+        get_asset_cache().set_budget(int(budget_mb) * 1024 * 1024)
+        self._stream_threshold = int(app_config.get('stream_threshold_mb') or DEFAULT_STREAM_THRESHOLD_MB) * 1024 * 1024
+        self._probe = (None, 0, 0) # (asset key, frame count, estimated decoded bytes) of the last probed GIF
+        # --- Repaint coalescing: frame changes are merged into at most one repaint per interval ---
+        self._max_fps = int(app_config.get('max_overlay_fps') or DEFAULT_MAX_FPS)
+        self._repaint_clock = QElapsedTimer()
+        self._repaint_clock.start()
+        self._last_repaint_ms = -1e9
+        self._pending_dirty = QRect() # Union of the regions changed since the last animation repaint
+        self._pending_frames = 0 # Frame changes merged into the pending repaint
+        self._dropped_frames = 0 # Frames never shown because a newer one replaced them first
+        self._repaint_times = deque() # Clock times (ms) of animation repaints during the last second
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._repaint_timer.timeout.connect(self._flush_animation_repaint)
+        # --- Suspension: no animation work while the overlay can't be seen ---
+        self._suspended = True # Until the window is first shown
+        self._cpu_sample = (time.monotonic(), time.process_time()) # For the idle CPU figure in the stats
+        self._animation_frame_size = QSize() # Source size of the playing GIF's frames
+        self._stats_requested.connect(self._on_stats_requested, Qt.ConnectionType.QueuedConnection)
+        # --- Settings updates: only the newest revision posted by the server is applied, at most once per frame ---
+        self._settings_mailbox = LatestValueMailbox()
+        self._settings_applied = 0
+        self._last_settings_ms = -1e9
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._settings_timer.timeout.connect(self._take_settings_revision)
 
     def _load_initial_position(self):
-        """Load saved overlay position from state manager or center if none saved."""
+        """Load saved crosshair center from state manager or center if none saved."""
         app_config = self.state_manager.get_app_config()
-        print(f"Overlay [LoadPos]: Read app_config: {app_config}")
-        x = app_config.get('overlay_x')
-        y = app_config.get('overlay_y')
-        print(f"Overlay [LoadPos]: Got x={x}, y={y}")
-        
+        x = app_config.get('overlay_center_x')
+        y = app_config.get('overlay_center_y')
+        if (x is None or y is None) and app_config.get('overlay_x') is not None and app_config.get('overlay_y') is not None:
+            # Older config: top-left corner of the fixed-size window
+            x = app_config['overlay_x'] + LEGACY_OVERLAY_SIZE // 2
+            y = app_config['overlay_y'] + LEGACY_OVERLAY_SIZE // 2
         if x is not None and y is not None:
             # Schedule the move to happen slightly after initialization
-            print(f"Overlay [LoadPos]: Scheduling move to ({x}, {y})")
+            logger.debug("Restoring saved center (%s, %s)", x, y)
             QTimer.singleShot(0, lambda: self._apply_initial_position(x, y))
         else:
-            print("Overlay [LoadPos]: No saved position found or values are None, centering on screen.")
+            logger.debug("No saved position found, centering on screen.")
             self.center_on_screen()
 
     def _apply_initial_position(self, x, y):
-        """Applies the loaded position, called via QTimer."""
-        print(f"Overlay [ApplyPos]: Applying position ({x}, {y})")
-        self.move(x, y)
-        print(f"Overlay [ApplyPos]: Position after scheduled move() call: {self.pos().x()}, {self.pos().y()}")
+        """Applies the loaded center position, called via QTimer."""
+        self._center = QPoint(x, y)
+        self._place_around_center()
+        logger.debug("Window placed at (%d, %d)", self.pos().x(), self.pos().y())
+
+    def _place_around_center(self, size=None):
+        """Moves (and optionally resizes) the window so the crosshair center stays at self._center."""
+        size = size or self.size()
+        if self._center is None:
+            self.resize(size)
+            return
+        self.setGeometry(self._center.x() - size.width() // 2, self._center.y() - size.height() // 2,
+                         size.width(), size.height())
+
+    def _save_center(self):
+        """Stores the current crosshair center as the saved position."""
+        self._center = self.pos() + QPoint(self.width() // 2, self.height() // 2)
+        self.state_manager.update_app_config_values({
+            'overlay_center_x': self._center.x(),
+            'overlay_center_y': self._center.y(),
+        }) # Saved in the background once the crosshair stops moving
 
     def mousePressEvent(self, event: QMouseEvent):
         """Capture initial mouse position for dragging and set dragging flag."""
@@ -90,9 +249,8 @@ class OverlayWidget(QWidget):
                 self._nudge_box_timer.stop()
             self.update() # Trigger repaint to hide bounding box
             new_pos = self.pos()
-            print(f"Overlay: Position changed to ({new_pos.x()}, {new_pos.y()}). Saving...")
-            self.state_manager.update_app_config('overlay_x', new_pos.x())
-            self.state_manager.update_app_config('overlay_y', new_pos.y())
+            logger.debug("Position changed to (%d, %d). Saving...", new_pos.x(), new_pos.y())
+            self._save_center()
             self.position_changed.emit(new_pos.x(), new_pos.y())
             event.accept()
 
@@ -121,11 +279,10 @@ class OverlayWidget(QWidget):
                 moved = True
 
             if moved:
-                print(f"Overlay: Nudging position to ({new_x}, {new_y})")
+                hot_logger.debug("Nudging position to (%d, %d)", new_x, new_y)
                 self.move(new_x, new_y)
                 # Save the new position immediately
-                self.state_manager.update_app_config('overlay_x', new_x)
-                self.state_manager.update_app_config('overlay_y', new_y)
+                self._save_center()
                 self.position_changed.emit(new_x, new_y) # Emit signal if needed elsewhere
                 
                 # Show bounding box and start timer
@@ -145,11 +302,205 @@ class OverlayWidget(QWidget):
         color.setAlpha(opacity)
         return color
 
-    @Slot()
-    def _on_frame_changed(self):
-        """Slot connected to QMovie's frameChanged signal."""
-        print(f"_on_frame_changed: Frame {self.animated_movie.currentFrameNumber()}")
-        self.update() # Trigger a repaint
+    @Slot(int)
+    def _on_frame_changed(self, frame_number):
+        """Slot connected to GifAnimation's frameChanged signal."""
+        hot_logger.debug("Frame %d", frame_number)
+        rect = self._animation_dirty_rect(frame_number)
+        if rect is None:
+            return # Frame is identical to the previous one
+        self._pending_dirty = self._pending_dirty.united(rect)
+        self._pending_frames += 1
+        if self._repaint_timer.isActive():
+            return # Merged into the repaint already scheduled
+        wait = self._last_repaint_ms + self._repaint_interval_ms() - self._repaint_clock.elapsed()
+        if wait <= 0:
+            self._flush_animation_repaint()
+        else:
+            self._repaint_timer.start(math.ceil(wait))
+
+    # --- Suspension while hidden, minimized or off-screen ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_suspension()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_suspension()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._update_suspension()
+
+    def moveEvent(self, event):
+        super().moveEvent(event)
+        self._update_suspension()
+
+    def _is_on_screen(self):
+        """Whether any part of the window lies on one of the screens."""
+        geometry = self.frameGeometry()
+        return any(screen.geometry().intersects(geometry) for screen in QApplication.screens())
+
+    def _update_suspension(self):
+        """Pauses the animation while the overlay can't be seen and resumes it when it can."""
+        suspend = not self.isVisible() or self.isMinimized() or not self._is_on_screen()
+        if suspend == self._suspended:
+            return
+        self._suspended = suspend
+        if suspend:
+            logger.debug("Not visible, suspending animation")
+            if self.animation:
+                self.animation.pause() # A FrameStream's decoder stops by itself once its buffer is full
+            self._repaint_timer.stop()
+            self._pending_dirty = QRect()
+            self._pending_frames = 0
+        else:
+            logger.debug("Visible again, resuming animation")
+            if self.animation:
+                self.animation.resume() # Continues at the frame that is due now
+            self.update()
+
+    def _cpu_percent(self):
+        """Returns the process CPU usage (% of one core) since the previous call."""
+        wall, cpu = time.monotonic(), time.process_time()
+        last_wall, last_cpu = self._cpu_sample
+        self._cpu_sample = (wall, cpu)
+        return round(100.0 * (cpu - last_cpu) / (wall - last_wall), 1) if wall > last_wall else 0.0
+
+    def _repaint_interval_ms(self):
+        return 1000.0 / self.target_fps()
+
+    def target_fps(self):
+        """Returns the effective animation repaint cap (the display refresh rate if max FPS is 0)."""
+        if self._max_fps > 0:
+            return self._max_fps
+        screen = self.screen() or QApplication.primaryScreen()
+        refresh = screen.refreshRate() if screen else 0
+        return refresh if refresh > 0 else FALLBACK_REFRESH_RATE
+
+    @Slot(int)
+    def set_max_fps(self, max_fps):
+        """Sets the animation repaint cap (0 = match the display)."""
+        self._max_fps = max(0, max_fps)
+        logger.info("Max animation FPS set to %s (%.0f)", self._max_fps or 'display refresh rate', self.target_fps())
+
+    def _flush_animation_repaint(self):
+        """Repaints the union of all frame changes since the last animation repaint."""
+        if self._pending_frames == 0:
+            return
+        now = self._repaint_clock.elapsed()
+        self._dropped_frames += self._pending_frames - 1
+        self._last_repaint_ms = now
+        self._repaint_times.append(now)
+        while self._repaint_times and self._repaint_times[0] <= now - 1000:
+            self._repaint_times.popleft()
+        self.update(self._pending_dirty) # Repaint only the region that changed
+        self._pending_dirty = QRect()
+        self._pending_frames = 0
+
+    def _animation_dirty_rect(self, frame_number):
+        """Returns the widget area that changes when the animation switches to frame_number."""
+        source_size = self._animation_frame_size
+        if self._show_bounding_box or source_size.isEmpty():
+            return self.rect()
+        frames = self.animation.frames() if self.animation else None
+        if hasattr(frames, 'frame_dirty_rect'):
+            dirty = frames.frame_dirty_rect(frame_number)
+            if dirty is None:
+                return None
+        else:
+            dirty = QRect(QPoint(0, 0), source_size) # No per-frame information (streaming)
+        scale = self._display_settings.get('animated', {}).get('scale', 1.0)
+        w = int(source_size.width() * scale)
+        h = int(source_size.height() * scale)
+        sx = w / source_size.width()
+        sy = h / source_size.height()
+        x0 = self.width() // 2 - w // 2
+        y0 = self.height() // 2 - h // 2
+        # Smooth scaling blends each source pixel into the neighbouring ones, so a change
+        # reaches up to one scaled source pixel (ceil(scale) device pixels) past its rect;
+        # one more pixel covers rounding
+        pad = math.ceil(max(sx, sy)) + 1
+        return QRectF(x0 + dirty.x() * sx, y0 + dirty.y() * sy,
+                      dirty.width() * sx, dirty.height() * sy).toAlignedRect().adjusted(-pad, -pad, pad, pad)
+
+    def _crosshair_size(self):
+        """Returns the window size that exactly holds the crosshair drawn for the display settings."""
+        settings = self._display_settings
+        crosshair_type = settings.get('type', 'parametric')
+        w = h = 0
+        if crosshair_type == 'parametric':
+            half = math.ceil(parametric_extent(settings.get('parametric', {})))
+            w = h = 2 * half + 1
+        elif crosshair_type == 'static' and self.static_pixmap and not self.static_pixmap.isNull():
+            scale = settings.get('static', {}).get('scale', 1.0)
+            w = int(self.static_pixmap.width() * scale)
+            h = int(self.static_pixmap.height() * scale)
+        elif crosshair_type == 'animated' and self.animation and not self._animation_frame_size.isEmpty():
+            scale = settings.get('animated', {}).get('scale', 1.0)
+            w = int(self._animation_frame_size.width() * scale)
+            h = int(self._animation_frame_size.height() * scale)
+        screen = (self.screen() or QApplication.primaryScreen()).geometry()
+        return QSize(min(screen.width(), max(MIN_OVERLAY_SIZE, w + 2 * FIT_MARGIN)),
+                     min(screen.height(), max(MIN_OVERLAY_SIZE, h + 2 * FIT_MARGIN)))
+
+    def _fit_to_crosshair(self):
+        """Resizes the window to the crosshair's bounding box, keeping the crosshair center in place."""
+        size = self._crosshair_size()
+        if size != self.size():
+            self._place_around_center(size)
+
+    def _current_frame_params(self):
+        """Returns the (scale, opacity) the animated frame table must be built for."""
+        anim_params = self._display_settings.get('animated', {})
+        return (anim_params.get('scale', 1.0), anim_params.get('opacity', 255))
+
+    def _frame_table_target(self):
+        """Returns the (scale, opacity) the frame table was built for, or is being built for right now."""
+        builder = self._frame_table_builders.get(self._frame_table_token)
+        return (builder.scale, builder.opacity) if builder else self._frame_table_params
+
+    def _reset_frame_table(self):
+        """Drops all prepared frames (used when the GIF changes)."""
+        self._frame_table = {}
+        self._frame_table_params = None
+        self._frame_table_token += 1 # Ignore results of any builder still running
+
+    def _rebuild_frame_table(self):
+        """Prepares all frames for the current scale/opacity in a worker thread.
+
+        Until the worker finishes, paintEvent keeps animating by scaling on the fly.
+        """
+        if not self.animation:
+            return
+        self._frame_table_token += 1
+        scale, opacity = self._current_frame_params()
+        frames = self.animation.frames()
+        if isinstance(frames, FrameStream):
+            return # Frames only exist briefly while streaming; scale them on the fly
+        first = frames[0]
+        table_bytes = self.animation.frameCount() * int(first.width() * scale) * int(first.height() * scale) * 4
+        if table_bytes > FRAME_TABLE_MAX_BYTES:
+            # Preparing every frame would undo the frame store's savings; scale on the fly instead
+            self._frame_table = {}
+            self._frame_table_params = None
+            return
+        source = frames.iter_frames() if hasattr(frames, 'iter_frames') else enumerate(frames)
+        builder = FrameTableBuilder(self._frame_table_token, source, scale, opacity)
+        builder.signals.finished.connect(self._on_frame_table_built)
+        self._frame_table_builders[self._frame_table_token] = builder # Keep alive until finished
+        QThreadPool.globalInstance().start(builder)
+
+    @Slot(int, object)
+    def _on_frame_table_built(self, token, table):
+        """Installs a frame table built by FrameTableBuilder if it is still current."""
+        builder = self._frame_table_builders.pop(token, None)
+        if token != self._frame_table_token or builder is None:
+            return # Superseded by a newer rebuild or a different GIF
+        self._frame_table = table
+        self._frame_table_params = (builder.scale, builder.opacity)
+        self.update()
 
     def paintEvent(self, event):
         """Handles drawing the crosshair and the temporary bounding box."""
@@ -162,40 +513,20 @@ class OverlayWidget(QWidget):
         center = QPoint(center_x, center_y)
         
         # --- Draw Crosshair --- 
-        crosshair_type = self.settings.get('type', 'parametric')
-        if not self.settings: # Don't draw if settings not loaded
+        crosshair_type = self._display_settings.get('type', 'parametric')
+        if not self._display_settings: # Don't draw if settings not loaded
             return
 
         # --- Parametric Drawing --- 
         if crosshair_type == 'parametric':
-            params = self.settings.get('parametric', {})
+            params = self._display_settings.get('parametric', {})
             if not params: return # Ensure params exist
-            # (Parametric drawing code as before...)
-            # Outline settings
-            outline_enabled = params.get('outline_enabled', False)
-            outline_thickness = params.get('outline_thickness', 1)
-            outline_color = self._get_color(params.get('outline_color', '#000000'), params.get('outline_opacity', 150))
-            # --- Draw Outline ---
-            if outline_enabled and outline_thickness > 0:
-                outline_pen = QPen(outline_color, outline_thickness * 2 + 1, Qt.PenStyle.SolidLine, Qt.PenCapStyle.SquareCap)
-                painter.setPen(outline_pen)
-                self._draw_parametric_lines(painter, center, params, is_outline=True, outline_thickness=outline_thickness)
-            # --- Draw Main Crosshair ---
-            painter.setPen(Qt.PenStyle.NoPen)
-            # Center Dot
-            if params.get('center_dot_enabled', False):
-                dot_size = params.get('center_dot_size', 3)
-                dot_color = self._get_color(params.get('center_dot_color', '#FF0000'), params.get('center_dot_opacity', 200))
-                painter.setBrush(dot_color)
-                painter.drawEllipse(center, dot_size, dot_size)
-            # Inner Lines
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            self._draw_parametric_lines(painter, center, params, is_outline=False)
-            # Outer Lines (TODO)
+            # Blit the pre-rendered crosshair; it is only re-rasterized when its inputs change
+            painter.drawPixmap(0, 0, self._get_parametric_pixmap(params))
 
         # --- Static Image Drawing --- 
         elif crosshair_type == 'static':
-            static_params = self.settings.get('static', {})
+            static_params = self._display_settings.get('static', {})
             if self.static_pixmap and not self.static_pixmap.isNull():
                 scale = static_params.get('scale', 1.0)
                 opacity = static_params.get('opacity', 255) / 255.0 # QPainter opacity is 0.0-1.0
@@ -216,25 +547,27 @@ class OverlayWidget(QWidget):
 
         # --- Animated GIF Drawing --- 
         elif crosshair_type == 'animated':
-            anim_params = self.settings.get('animated', {})
-            if self.animated_movie and self.animated_movie.isValid():
-                # Debug: Print frame number being drawn
-                # print(f"paintEvent: Drawing frame {self.animated_movie.currentFrameNumber()}") 
-                pixmap = self.animated_movie.currentPixmap()
-                if not pixmap.isNull():
+            anim_params = self._display_settings.get('animated', {})
+            if self.animation and self.animation.isValid():
+                frame = self._frame_table.get(self.animation.currentFrameNumber())
+                if frame is not None and self._frame_table_params == self._current_frame_params():
+                    # Frame is already at its final size and opacity: straight unscaled blit
+                    painter.drawImage(center_x - frame.width() // 2, center_y - frame.height() // 2, frame)
+                else:
+                    # Table not ready (just loaded or rebuild in progress): scale on the fly
+                    image = self.animation.currentImage()
                     scale = anim_params.get('scale', 1.0)
                     opacity = anim_params.get('opacity', 255) / 255.0
-                    w = int(pixmap.width() * scale)
-                    h = int(pixmap.height() * scale)
+                    w = int(image.width() * scale)
+                    h = int(image.height() * scale)
                     x = center_x - w // 2
                     y = center_y - h // 2
                     painter.setOpacity(opacity)
-                    painter.drawPixmap(x, y, w, h, pixmap)
+                    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+                    painter.drawImage(QRect(x, y, w, h), image)
                     painter.setOpacity(1.0)
-                else: 
-                    self._draw_placeholder_error(painter, center)
             else:
-                # Draw indicator if movie failed to load or isn't set
+                # Draw indicator if the GIF failed to load or isn't set
                  self._draw_placeholder_error(painter, center, QColor("lime")) # Lime X for unloaded GIF
 
         # --- Draw Bounding Box if Dragging --- 
@@ -245,6 +578,50 @@ class OverlayWidget(QWidget):
             rect = self.rect().adjusted(0, 0, -1, -1) # Adjust for pen width
             painter.drawRect(rect)
 
+    def _get_parametric_pixmap(self, params):
+        """Returns the cached parametric crosshair pixmap, re-rendering it if its key changed."""
+        dpr = self.devicePixelRatioF()
+        key = (self._parametric_params_key, dpr, self.width(), self.height())
+        if self._parametric_pixmap is None or self._parametric_pixmap_key != key:
+            self._parametric_pixmap = self._render_parametric_pixmap(params, dpr)
+            self._parametric_pixmap_key = key
+        return self._parametric_pixmap
+
+    def _render_parametric_pixmap(self, params, dpr):
+        """Rasterizes the parametric crosshair once into a premultiplied ARGB pixmap."""
+        image = QImage(round(self.width() * dpr), round(self.height() * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._draw_parametric(painter, QPoint(self.width() // 2, self.height() // 2), params)
+        painter.end()
+        return QPixmap.fromImage(image)
+
+    def _draw_parametric(self, painter, center, params):
+        """Draws the parametric crosshair (outline, center dot and lines) around center."""
+        # Outline settings
+        outline_enabled = params.get('outline_enabled', False)
+        outline_thickness = params.get('outline_thickness', 1)
+        outline_color = self._get_color(params.get('outline_color', '#000000'), params.get('outline_opacity', 150))
+        # --- Draw Outline ---
+        if outline_enabled and outline_thickness > 0:
+            outline_pen = QPen(outline_color, outline_thickness * 2 + 1, Qt.PenStyle.SolidLine, Qt.PenCapStyle.SquareCap)
+            painter.setPen(outline_pen)
+            self._draw_parametric_lines(painter, center, params, is_outline=True, outline_thickness=outline_thickness)
+        # --- Draw Main Crosshair ---
+        painter.setPen(Qt.PenStyle.NoPen)
+        # Center Dot
+        if params.get('center_dot_enabled', False):
+            dot_size = params.get('center_dot_size', 3)
+            dot_color = self._get_color(params.get('center_dot_color', '#FF0000'), params.get('center_dot_opacity', 200))
+            painter.setBrush(dot_color)
+            painter.drawEllipse(center, dot_size, dot_size)
+        # Inner Lines
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        self._draw_parametric_lines(painter, center, params, is_outline=False)
+        # Outer Lines (TODO)
+
     def _draw_placeholder_error(self, painter, center, color=QColor("red")):
         """Draws a colored X."""
         painter.setPen(QPen(color, 2))
@@ -316,79 +693,320 @@ class OverlayWidget(QWidget):
         if p1_right.x() < p2_right.x():
              painter.drawLine(p1_right, p2_right)
 
+    def post_settings_revision(self, revision):
+        """Notifies the overlay that settings revision was committed (safe to call from any thread).
+
+        The revision goes into a single-slot mailbox: if an earlier one is
+        still waiting there it is replaced, so a burst of updates (a slider
+        drag, several clients) reaches the GUI thread as one call.
+        """
+        if self._settings_mailbox.post(revision):
+            QMetaObject.invokeMethod(self, "_take_settings_revision", Qt.ConnectionType.QueuedConnection)
+
+    @Slot()
+    def _take_settings_revision(self):
+        """Applies the revision waiting in the mailbox, unless one was applied less than a frame ago."""
+        if self._settings_timer.isActive():
+            return # Already scheduled for the next frame
+        wait = self._last_settings_ms + self._repaint_interval_ms() - self._repaint_clock.elapsed()
+        if wait > 0:
+            self._settings_timer.start(math.ceil(wait)) # The mailbox stays full, so later posts replace it
+            return
+        taken, revision = self._settings_mailbox.take()
+        if taken:
+            self.apply_settings_revision(revision)
+
+    @Slot(int)
+    def apply_settings_revision(self, revision):
+        """Applies the StateManager's current settings, now that revision has been committed.
+
+        The server only sends revision numbers; the validated, immutable
+        CrosshairSettings is read here and used as is, so nothing is
+        serialized or parsed again. Notifications for revisions already
+        applied (a later one was read) are skipped.
+        """
+        if revision <= self._settings_revision:
+            return
+        revision, new_settings = self.state_manager.get_settings_revision()
+        self._settings_revision = revision
+        self._settings_applied += 1
+        self._last_settings_ms = self._repaint_clock.elapsed()
+        self._apply_settings(new_settings)
+
     @Slot(str)
     def update_crosshair(self, new_settings_json: str):
-        """Updates the internal settings (from JSON string), loads resources, and triggers repaint."""
+        """Updates the internal settings from a JSON string (for callers outside the StateManager)."""
         try:
-            # Parse the JSON string back into a dictionary
-            new_settings = json.loads(new_settings_json)
-            # Basic check if it's a dictionary after parsing
-            if not isinstance(new_settings, dict):
-                 print("Overlay Error: Received settings are not a valid dictionary after JSON parsing.")
-                 return
-
+            # Parse the JSON string into the typed (read-only) settings model
+            new_settings = CrosshairSettings.from_dict(json.loads(new_settings_json))
         except json.JSONDecodeError as e:
-            print(f"Overlay Error: Failed to parse settings JSON: {e}")
+            logger.error("Failed to parse settings JSON: %s", e)
+            return
+        except SettingsError as e:
+            logger.error("Received invalid settings: %s", e)
             return
+        self._apply_settings(new_settings)
 
-        print(f"Overlay: Received settings update via JSON: {new_settings}") # Debug
+    def _apply_settings(self, new_settings):
+        """Switches to new settings (a CrosshairSettings), loads resources, and triggers repaint."""
+        logger.debug("Received settings update: %s", new_settings)
+        changes = diff_settings(self.settings, new_settings)
         self.settings = new_settings
+        # Only a new type, file name or file version (re)loads resources; costs one stat() otherwise
+        self._sync_resources()
+        if self._pending_load:
+            return # Keep drawing the previous crosshair until the new asset's first frame arrives
+        if not changes:
+            return # Nothing visible changed (e.g. a repeated slider event)
+        logger.debug("Applying changes: %s", sorted(changes))
+        self._set_display_settings(self.settings)
+
+        if self.animation:
+            if CHANGE_SPEED in changes:
+                self.animation.setSpeed(self.settings.get('animated', {}).get('speed', 100)) # Applied live, no restart
+            if self._stream_token is None and self._frame_table_target() != self._current_frame_params():
+                self._rebuild_frame_table() # Scale or opacity changed
+
+        # Static scale/opacity and parametric looks only need a repaint
+        self.update() # Request repaint
+
+    def _set_display_settings(self, settings):
+        """Makes settings the ones paintEvent draws."""
+        if settings.get('parametric') != self._display_settings.get('parametric'):
+            self._parametric_params_key = hash(settings.get('parametric')) # ParametricSettings hashes its values
+            self._parametric_pixmap = None # Re-rasterized on the next paint
+        self._display_settings = settings
+        self._fit_to_crosshair()
+
+    def _wanted_resource(self, settings=None):
+        """Returns (kind, full path) of the file settings (default: the current ones) need; (None, None) for parametric."""
+        settings = settings if settings is not None else self.settings
+        crosshair_type = settings.get('type')
+        if crosshair_type == 'static':
+            name = settings.get('static', {}).get('image_path')
+        elif crosshair_type == 'animated':
+            name = settings.get('animated', {}).get('gif_path')
+        else:
+            return None, None
+        return crosshair_type, os.path.join(self._get_user_data_dir(), 'uploads', name) if name else None
+
+    def prewarm(self, settings):
+        """Decodes the file settings need into the asset cache right away (blocking).
+
+        Called at startup before the overlay is shown, so the restored
+        crosshair is drawn on the first paint instead of after a background
+        load. Files estimated to decode to more than PREWARM_MAX_MB, or
+        that would be streamed, are left to the usual background loading.
+        """
+        kind, path = self._wanted_resource(settings)
+        if not path or not os.path.exists(path):
+            return
+        if kind == 'animated':
+            mode = settings.get('animated', {}).get('playback_mode', 'auto')
+            if mode == 'stream':
+                return
+            _, decoded_bytes = probe_animation(path)
+            if decoded_bytes > PREWARM_MAX_MB * 1024 * 1024 or (mode == 'auto' and decoded_bytes > self._stream_threshold):
+                return
+        get_asset_cache().load(path)
+
+    def _sync_resources(self):
+        """Makes sure the image or GIF the current settings need is loaded or loading.
 
-        # --- Clear previous resources --- 
+        A resource is only reloaded when its file name, or the file itself
+        (mtime/size, e.g. an upload replaced under the same name), changed.
+        Recently used files come straight from the asset cache; anything else
+        is decoded by an AssetLoader in the thread pool. GIFs played in
+        'stream' mode get a FrameStream instead and are never cached.
+        """
+        kind, path = self._wanted_resource()
+        key = _source_key(path)
+        if kind == 'animated' and path and self._should_stream(path, key):
+            kind = 'stream'
+        if (kind, key) == self._loaded_resource:
+            self._cancel_pending_load() # e.g. switched back before another file finished loading
+            return
+        if self._pending_load and self._pending_load[1:] == (kind, key):
+            return # Already loading
+        self._cancel_pending_load()
+
+        if kind == 'stream':
+            self._start_frame_stream(path, key)
+            return
+        asset = get_asset_cache().get(path) if path else None
+        if path is None or asset is not None:
+            self._install_resource(kind, key, asset.frames if asset else [], asset.delays if asset else [])
+            return
+
+        self._next_load_token += 1
+        token = self._next_load_token
+        logger.info("Loading %s asset in background: %s", kind, path)
+        loader = AssetLoader(token, path, max_frames=1 if kind == 'static' else None)
+        loader.signals.frames_ready.connect(self._on_asset_frames_ready)
+        loader.signals.finished.connect(self._on_asset_load_finished)
+        self._asset_loaders[token] = loader # Keep alive until finished
+        self._pending_load = (token, kind, key)
+        QThreadPool.globalInstance().start(loader)
+
+    def _should_stream(self, path, key):
+        """Decides whether a GIF plays from a bounded frame buffer instead of being fully decoded."""
+        mode = self.settings.get('animated', {}).get('playback_mode', 'auto')
+        if mode == 'cache':
+            return False
+        if self._probe[0] != key:
+            self._probe = (key, *probe_animation(path))
+        _, frame_count, decoded_bytes = self._probe
+        if frame_count < 2:
+            return False # Still image, or the format doesn't report its frame count
+        return mode == 'stream' or decoded_bytes > self._stream_threshold
+
+    def _start_frame_stream(self, path, key):
+        self._next_load_token += 1
+        token = self._next_load_token
+        logger.info("Streaming animated asset: %s", path)
+        stream = FrameStream(token, path, self._probe[1])
+        stream.signals.ready.connect(self._on_frame_stream_ready)
+        self._asset_loaders[token] = stream # Until its first frame arrives; then the animation owns it
+        self._pending_load = (token, 'stream', key)
+        stream.start()
+
+    @Slot(int, bool)
+    def _on_frame_stream_ready(self, token, ok):
+        stream = self._asset_loaders.pop(token, None)
+        if not (self._pending_load and token == self._pending_load[0]):
+            if stream:
+                stream.close() # Superseded while decoding its first frame
+            return
+        _, kind, key = self._pending_load
+        self._pending_load = None
+        if ok:
+            self._install_resource(kind, key, stream, stream.delays)
+        else:
+            logger.error("Error loading animated asset at %s", key[0])
+            self._install_resource(kind, key, [], [])
+
+    def _cancel_pending_load(self):
+        if self._pending_load:
+            loader = self._asset_loaders.get(self._pending_load[0])
+            if loader:
+                loader.cancel()
+            self._pending_load = None
+
+    @Slot(int, object, object)
+    def _on_asset_frames_ready(self, token, frames, delays):
+        """Shows the first frame of a newly loaded asset, or appends streamed frames to the playing GIF."""
+        if self._pending_load and token == self._pending_load[0]:
+            _, kind, key = self._pending_load
+            self._pending_load = None
+            self._install_resource(kind, key, frames, delays, stream_token=token)
+        elif token == self._stream_token and self.animation:
+            self.animation.append_frames(delays)
+
+    @Slot(int, int)
+    def _on_asset_load_finished(self, token, frame_count):
+        loader = self._asset_loaders.pop(token, None)
+        if self._pending_load and token == self._pending_load[0]:
+            # Finished without a single frame: the file is missing or unreadable
+            _, kind, key = self._pending_load
+            self._pending_load = None
+            logger.error("Error loading %s asset at %s", kind, loader.path if loader else key)
+            self._install_resource(kind, key, [], [])
+        elif token == self._stream_token:
+            self._stream_token = None
+            if self.animation:
+                self.animation.finish_frames()
+                logger.debug("Animated GIF fully decoded (%d frames)", frame_count)
+                self._rebuild_frame_table() # Now covers every frame
+
+    def _install_resource(self, kind, key, frames, delays, stream_token=None):
+        """Replaces the displayed image/GIF and switches drawing to the current settings.
+
+        Args:
+            frames, delays: decoded frames (empty if loading failed or no file is set)
+            stream_token: loader still decoding the remaining frames, if any
+        """
+        self._release_animation()
         self.static_pixmap = None
-        if self.animated_movie:
-            self.animated_movie.stop()
+        if kind == 'static' and frames:
+            self.static_pixmap = QPixmap.fromImage(frames[0])
+            logger.debug("Static image loaded from %s", key[0])
+        elif kind in ('animated', 'stream') and frames:
+            self._start_animation(frames, delays, complete=stream_token is None)
+            self._stream_token = stream_token
+        self._loaded_resource = (kind, key)
+        self._set_display_settings(self.settings)
+        if self.animation and stream_token is None:
+            self._rebuild_frame_table() # After _set_display_settings(), so it uses the new scale/opacity
+        self.update()
+
+    def _release_animation(self):
+        """Stops and discards the current animation, its prepared frames and any loader still feeding it."""
+        if self._stream_token is not None:
+            loader = self._asset_loaders.get(self._stream_token)
+            if loader:
+                loader.cancel()
+            self._stream_token = None
+        if self.animation:
+            self.animation.stop()
+            if isinstance(self.animation.frames(), FrameStream):
+                self.animation.frames().close() # Stop its decoder thread
             try: 
-                self.animated_movie.frameChanged.disconnect(self._on_frame_changed)
+                self.animation.frameChanged.disconnect(self._on_frame_changed)
             except RuntimeError: pass 
-            self.animated_movie = None
+            self.animation.deleteLater()
+            self.animation = None
+        self._animation_frame_size = QSize()
+        self._reset_frame_table()
 
-        # --- Load new resources based on type --- 
-        crosshair_type = self.settings.get('type')
+    def _start_animation(self, frames, delays, complete):
+        """Starts playing decoded GIF frames (complete=False while the rest are still decoding)."""
+        self.animation = GifAnimation(frames, delays, parent=self, complete=complete)
+        self._animation_frame_size = self.animation.currentImage().size()
+        speed = self.settings.get('animated', {}).get('speed', 100)
+        self.animation.setSpeed(speed)
+        self.animation.frameChanged.connect(self._on_frame_changed)
+        self.animation.start()
+        if self._suspended:
+            self.animation.pause() # Loaded while hidden: starts moving once the overlay is visible
+        logger.debug("Started GIF animation with speed: %s", speed)
 
-        if crosshair_type == 'static':
-            static_params = self.settings.get('static', {})
-            image_name = static_params.get('image_path')
-            if image_name:
-                # Get user data directory
-                user_data_dir = self._get_user_data_dir()
-                full_path = os.path.join(user_data_dir, 'uploads', image_name)
-                print(f"Overlay: Attempting to load static image: {full_path}")
-                pixmap = QPixmap(full_path)
-                if pixmap.isNull():
-                    print(f"Overlay: Error loading static image at {full_path}")
-                    self.static_pixmap = None
-                else:
-                    print(f"Overlay: Static image loaded successfully from {full_path}")
-                    self.static_pixmap = pixmap
-            else:
-                self.static_pixmap = None
+    def collect_playback_stats(self, timeout=STATS_TIMEOUT):
+        """Returns get_playback_stats(), gathered on the GUI thread (safe to call from any thread).
 
-        elif crosshair_type == 'animated':
-            anim_params = self.settings.get('animated', {})
-            gif_name = anim_params.get('gif_path')
-            if gif_name:
-                # Get user data directory
-                user_data_dir = self._get_user_data_dir()
-                full_path = os.path.join(user_data_dir, 'uploads', gif_name)
-                print(f"Overlay: Attempting to load animated GIF: {full_path}")
-                movie = QMovie(full_path)
-                if not movie.isValid():
-                    print(f"Overlay: Error loading or invalid GIF format at {full_path}")
-                    self.animated_movie = None
-                else:
-                    print(f"Overlay: Animated GIF loaded successfully from {full_path}")
-                    self.animated_movie = movie
-                    self.animated_movie.setCacheMode(QMovie.CacheMode.CacheAll)
-                    speed = anim_params.get('speed', 100)
-                    self.animated_movie.setSpeed(speed)
-                    self.animated_movie.frameChanged.connect(self._on_frame_changed)
-                    self.animated_movie.start()
-                    print(f"Overlay: Started GIF animation with speed: {speed}")
-            else:
-                 self.animated_movie = None
+        Returns None if the GUI thread doesn't get to it within timeout seconds.
+        """
+        if QThread.currentThread() == self.thread():
+            return self.get_playback_stats()
+        request = {'event': threading.Event(), 'stats': None}
+        self._stats_requested.emit(request)
+        request['event'].wait(timeout)
+        return request['stats']
 
-        self.update() # Request repaint
+    @Slot(object)
+    def _on_stats_requested(self, request):
+        request['stats'] = self.get_playback_stats()
+        request['event'].set()
+
+    def get_playback_stats(self):
+        """Returns frame pacing statistics of the current animation and decoded asset cache usage."""
+        animation = self.animation
+        frames = animation.frames() if animation else None
+        now = self._repaint_clock.elapsed()
+        return {
+            'animation': animation.pacing_stats() if animation else None,
+            'suspended': self._suspended,
+            'process_cpu_percent': self._cpu_percent(), # Since the previous stats request; ~0 while suspended
+            'repaint': {
+                'max_fps': self._max_fps, # 0 = match display
+                'target_fps': round(self.target_fps(), 1),
+                'effective_fps': sum(1 for t in list(self._repaint_times) if t > now - 1000),
+                'dropped_frames': self._dropped_frames,
+            },
+            'frame_memory': frames.memory_stats() if hasattr(frames, 'memory_stats') else None,
+            'asset_cache': get_asset_cache().stats(),
+            'settings_updates': {**self._settings_mailbox.stats(), 'applied': self._settings_applied},
+            'loading': self._pending_load is not None or self._stream_token is not None,
+        }
 
     def _get_user_data_dir(self):
         """Get the platform-specific user data directory."""
@@ -406,14 +1024,10 @@ class OverlayWidget(QWidget):
     def center_on_screen(self):
         """Centers the widget on the primary screen."""
         if screen_geometry := QApplication.primaryScreen().availableGeometry():
-            self.setGeometry(
-                screen_geometry.center().x() - self.width() // 2,
-                screen_geometry.center().y() - self.height() // 2,
-                self.width(),
-                self.height()
-            )
+            self._center = screen_geometry.center()
+            self._place_around_center()
         else:
-            print("Warning: Could not get screen geometry to center window.")
+            logger.warning("Could not get screen geometry to center window.")
 
     def _hide_bounding_box(self):
         """Slot connected to _nudge_box_timer timeout."""
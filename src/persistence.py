@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# A scheduled write waits until no change came in for this long...
+DEFAULT_QUIET_PERIOD = 0.5
+# ...but never longer than this after the first unsaved change (e.g. during a long drag)
+DEFAULT_MAX_DELAY = 5.0
+# The settings journal is folded into its snapshot file after this many records
+JOURNAL_COMPACT_RECORDS = 256
+
+def atomic_write_json(path, data, **json_kwargs):
+    """Writes data as JSON so that path always holds either the old or the complete new file.
+
+    The document goes to a temporary file in the same folder, is fsynced,
+    then renamed over path. Raises OSError (the temporary file is removed).
+    """
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, **json_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+def _fsync_dir(path):
+    """Makes a rename durable on POSIX (directories can't be opened like this on Windows)."""
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+_MISSING = object()
+
+def diff_documents(old, new):
+    """Returns the nested dict of values in new that differ from old (empty if equal).
+
+    Unchanged branches are skipped by identity first, so diffing two
+    settings snapshots that share structure is cheap. Returns None if new
+    lacks keys old has, which a diff can't express.
+    """
+    if any(key not in new for key in old):
+        return None
+    changes = {}
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if value is previous:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            sub = diff_documents(previous, value)
+            if sub is None:
+                changes[key] = value
+            elif sub:
+                changes[key] = sub
+        elif value != previous or type(value) is not type(previous):
+            changes[key] = value
+    return changes
+
+def apply_diff(base, changes):
+    """Inverse of diff_documents(): returns a copy of base with changes merged in."""
+    result = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            result[key] = apply_diff(base[key], value)
+        else:
+            result[key] = value
+    return result
+
+class SettingsJournal:
+    """Stores a JSON document as a snapshot file plus an append-only journal of changes.
+
+    Each save appends one line with only the values that changed since the
+    previous save, which is much less to write than the whole document.
+    After JOURNAL_COMPACT_RECORDS lines the current document is written as
+    the new snapshot (atomically) and the journal starts over. Every record
+    carries a sequence number, so records already folded into the snapshot
+    are skipped if a crash happened between writing the snapshot and
+    truncating the journal; a torn last line is ignored.
+
+    Not thread-safe: load() once, then save() from one thread at a time
+    (e.g. a WriteBehindWriter).
+    """
+    def __init__(self, folder, name='settings'):
+        self.snapshot_path = os.path.join(folder, f"{name}.json")
+        self.journal_path = os.path.join(folder, f"{name}.journal")
+        self._document = None # Last saved/loaded document
+        self._seq = 0
+        self._records = 0 # Records in the journal file
+        self._compactions = 0
+
+    def load(self):
+        """Returns the saved document, or None if nothing was saved yet (or it is unreadable)."""
+        document = None
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            document = snapshot['document']
+            self._seq = snapshot['seq']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Error reading %s: %s", self.snapshot_path, e)
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning("Ignoring a damaged record in %s", self.journal_path)
+                        self._records = JOURNAL_COMPACT_RECORDS # Rewrite the files on the next save instead of appending after it
+                        break # Torn write at the end of the file
+                    self._records += 1
+                    if record['seq'] <= self._seq:
+                        continue # Already part of the snapshot
+                    if 'document' in record:
+                        document = record['document']
+                    elif document is not None:
+                        document = apply_diff(document, record['changes'])
+                    self._seq = record['seq']
+        except FileNotFoundError:
+            pass
+        except (OSError, KeyError, TypeError) as e:
+            logger.error("Error reading %s: %s", self.journal_path, e)
+        self._document = document
+        logger.debug("Loaded %s (sequence %d, %d journal records)", self.snapshot_path, self._seq, self._records)
+        return document
+
+    def save(self, document):
+        """Appends the changes since the last save (nothing if equal). Raises OSError."""
+        if self._document is None:
+            changes = None
+        else:
+            changes = diff_documents(self._document, document)
+            if changes == {}:
+                return
+        self._seq += 1
+        if self._records + 1 >= JOURNAL_COMPACT_RECORDS:
+            self._compact(document)
+        else:
+            record = {'seq': self._seq, 'document': document} if changes is None else {'seq': self._seq, 'changes': changes}
+            line = json.dumps(record, separators=(',', ':')) + '\n'
+            try:
+                with open(self.journal_path, 'a') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                # Part of the line may have been written; load() stops at a torn line, so
+                # anything appended after it would be lost. Rewrite the files on the next save.
+                self._records = JOURNAL_COMPACT_RECORDS
+                raise
+            self._records += 1
+        self._document = document
+
+    def _compact(self, document):
+        atomic_write_json(self.snapshot_path, {'seq': self._seq, 'document': document}, indent=4)
+        with open(self.journal_path, 'w'): # Truncate; its records are all in the snapshot now
+            pass
+        self._records = 0
+        self._compactions += 1
+
+    def stats(self):
+        return {'sequence': self._seq, 'journal_records': self._records, 'compactions': self._compactions}
+
+class WriteBehindWriter:
+    """Saves data from a background thread, coalescing bursts of changes into one write.
+
+    Callers only call mark_dirty(); the writer thread calls save() once
+    changes have stopped for quiet_period seconds (or max_delay seconds
+    after the first unsaved change). save() reads the current data itself
+    and raises OSError on failure. flush() writes pending changes right
+    away, e.g. at shutdown.
+    """
+    def __init__(self, save, quiet_period=DEFAULT_QUIET_PERIOD, max_delay=DEFAULT_MAX_DELAY, name='config-writer'):
+        self.name = name
+        self._save = save
+        self._quiet_period = quiet_period
+        self._max_delay = max_delay
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock() # Serializes the writer thread and flush()
+        self._first_change = None # Time of the oldest unsaved change, None when clean
+        self._last_change = None
+        self._closed = False
+        self._requested = 0
+        self._batched = 0 # Requests covered by writes started so far
+        self._written = 0
+        self._saved = 0
+        self._failed = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Schedules a write of the current data. Never blocks on disk I/O."""
+        with self._cond:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._requested += 1
+            self._cond.notify()
+
+    def _due_in_nolock(self):
+        """Seconds until the pending write is due (<= 0 when due), or None if there is nothing to write."""
+        if self._first_change is None:
+            return None
+        due = min(self._last_change + self._quiet_period, self._first_change + self._max_delay)
+        return due - time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    wait = self._due_in_nolock()
+                    if wait is not None and wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Writes pending changes now, on the calling thread. Returns False if writing failed."""
+        with self._write_lock:
+            with self._cond:
+                if self._first_change is None:
+                    return True
+                self._first_change = self._last_change = None
+                batch = self._requested - self._batched
+                self._batched = self._requested
+            try:
+                self._save() # Reads the data after clearing the flag, so later changes schedule another write
+            except OSError as e:
+                with self._cond:
+                    self._failed += 1
+                    self._batched -= batch # Still unsaved
+                    if self._first_change is None: # Retry after max_delay (or at shutdown)
+                        self._first_change = self._last_change = time.monotonic() + self._max_delay
+                logger.error("%s: error writing: %s", self.name, e)
+                return False
+            with self._cond:
+                self._written += 1
+                self._saved += max(0, batch - 1)
+            logger.debug("%s: saved", self.name)
+            return True
+
+    def close(self):
+        """Flushes pending changes and stops the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        return self.flush()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'requested': self._requested,
+                'written': self._written,
+                'saved': self._saved, # Writes avoided by coalescing changes
+                'failed': self._failed,
+                'pending': self._first_change is not None,
+            }
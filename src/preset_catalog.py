@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from http_cache import make_etag
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# File types that are listed as presets
+PRESET_EXTENSIONS = ('.gif', '.png')
+# Minimum number of seconds between two directory staleness checks
+DEFAULT_CHECK_INTERVAL = 2.0
+
+def _make_record(path, stat):
+    return {
+        'path': path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'etag': make_etag(stat.st_size, stat.st_mtime_ns), # Computed once per change
+    }
+
+def _make_entry(filename, record):
+    name, ext = os.path.splitext(filename)
+    return {
+        'name': name,
+        'filename': filename,
+        'size_kb': round(record['size'] / 1024, 1),
+        'extension': ext[1:].upper(),
+        'version': record['etag'], # Changes with the file; versions its thumbnail URLs (?v=...)
+    }
+
+class PresetCatalog:
+    """In-memory index of the preset files found in one or more preset folders.
+
+    The index is built once with a single directory walk and kept fresh by
+    comparing the modification time of each preset folder (which changes
+    whenever a file is added, removed or renamed) and the size and
+    modification time of each indexed file (which change when a file is
+    overwritten in place, leaving its folder's mtime alone). Page requests
+    are then a plain slice of the sorted list instead of a filesystem walk.
+    """
+    def __init__(self, locations, check_interval=DEFAULT_CHECK_INTERVAL):
+        self._lock = threading.Lock()
+        self._locations = []
+        for location in locations: # Keep first-seen order, drop duplicates
+            if location and location not in self._locations:
+                self._locations.append(location)
+        self._check_interval = check_interval
+        self._entries = [] # Sorted list of public preset dicts
+        self._records = {} # filename -> {'path', 'size', 'mtime_ns', 'etag'}
+        self._dir_stamps = {} # location -> directory mtime_ns at last build
+        self._generation = 0 # Bumped on every rebuild
+        self._last_check = 0.0
+
+    @property
+    def locations(self):
+        return list(self._locations)
+
+    @property
+    def generation(self):
+        """Catalog version; changes whenever a preset is added, removed or modified."""
+        with self._lock:
+            return self._generation
+
+    def refresh(self, force=False):
+        """Rebuilds the index if a preset folder changed (or if forced) and updates modified presets."""
+        with self._lock:
+            self._refresh_nolock(force)
+
+    def _refresh_nolock(self, force=False):
+        """Returns True if it checked the folders and files, False if they were checked recently."""
+        now = time.monotonic()
+        if not force and self._generation and now - self._last_check < self._check_interval:
+            return False # Checked recently, trust the current index
+        self._last_check = now
+        stamps = self._stat_locations()
+        if force or not self._generation or stamps != self._dir_stamps:
+            self._rebuild_nolock(stamps)
+        else:
+            self._revalidate_nolock(self._records)
+        return True
+
+    def _revalidate_nolock(self, filenames):
+        """Re-stats indexed presets and updates the records of those overwritten since they were indexed."""
+        changed = {}
+        for filename in filenames:
+            record = self._records.get(filename)
+            if record is None:
+                continue
+            try:
+                stat = os.stat(record['path'])
+            except OSError: # Deleted or replaced since the last check; let a folder walk sort it out
+                self._rebuild_nolock(self._stat_locations())
+                return
+            if stat.st_size != record['size'] or stat.st_mtime_ns != record['mtime_ns']:
+                changed[filename] = stat
+        if not changed:
+            return
+        # Records and entries are replaced, not updated, since page() hands out the entry dicts
+        for filename, stat in changed.items():
+            self._records[filename] = _make_record(self._records[filename]['path'], stat)
+        self._entries = [_make_entry(entry['filename'], self._records[entry['filename']]) if entry['filename'] in changed else entry
+                         for entry in self._entries]
+        self._generation += 1
+        logger.debug("Preset catalog updated %d modified preset(s) (generation %d)", len(changed), self._generation)
+
+    def _stat_locations(self):
+        """Returns the current mtime of every preset folder (one stat per folder)."""
+        stamps = {}
+        for location in self._locations:
+            try:
+                stamps[location] = os.stat(location).st_mtime_ns
+            except OSError:
+                stamps[location] = None # Missing folder
+        return stamps
+
+    def _rebuild_nolock(self, stamps):
+        """Walks all preset folders once and rebuilds the sorted index."""
+        records = {}
+        entries = []
+        for location, stamp in stamps.items():
+            if stamp is None:
+                continue
+            try:
+                with os.scandir(location) as it:
+                    for dir_entry in it:
+                        filename = dir_entry.name
+                        # Use filename as key to handle duplicates across folders (first folder wins)
+                        if filename in records or not filename.lower().endswith(PRESET_EXTENSIONS):
+                            continue
+                        try:
+                            if not dir_entry.is_file():
+                                continue
+                            stat = dir_entry.stat()
+                        except OSError as e:
+                            logger.warning("Error processing file %s in %s: %s", filename, location, e)
+                            continue
+                        records[filename] = _make_record(dir_entry.path, stat)
+                        entries.append(_make_entry(filename, records[filename]))
+            except OSError as e:
+                logger.warning("Error listing directory %s: %s", location, e)
+
+        entries.sort(key=lambda x: x['name'])
+        self._entries = entries
+        self._records = records
+        self._dir_stamps = stamps
+        self._generation += 1
+        logger.debug("Preset catalog rebuilt: %d presets in %d location(s) (generation %d)", len(entries), len(stamps), self._generation)
+
+    def page(self, page, per_page):
+        """Returns (presets, total) for a 1-based page of the sorted catalog."""
+        with self._lock:
+            self._refresh_nolock()
+            start_index = (page - 1) * per_page
+            return self._entries[start_index:start_index + per_page], len(self._entries)
+
+    def lookup(self, filename):
+        """Returns the absolute path of an indexed preset, or None."""
+        with self._lock:
+            self._refresh_nolock()
+            record = self._records.get(filename)
+            return record['path'] if record else None
+
+    def lookup_record(self, filename):
+        """Returns a copy of the index record {'path', 'size', 'mtime_ns', 'etag'} of a preset, or None.
+
+        The preset is re-stat'ed, so the record reflects a file overwritten in place.
+        """
+        with self._lock:
+            if not self._refresh_nolock():
+                self._revalidate_nolock((filename,))
+            record = self._records.get(filename)
+            return dict(record) if record else None
+
+    def records(self):
+        """Returns a copy of filename -> {'path', 'size', 'mtime_ns', 'etag'} for every indexed preset.
+
+        Every preset is re-stat'ed, so records reflect files overwritten in place.
+        """
+        with self._lock:
+            if not self._refresh_nolock():
+                self._revalidate_nolock(self._records)
+            return {filename: dict(record) for filename, record in self._records.items()}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
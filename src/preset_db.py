@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Name of the metadata database inside the user data directory
+PRESET_DB_FILENAME = 'preset_index.sqlite3'
+# Number of dominant colors stored per preset
+DOMINANT_COLOR_COUNT = 4
+# Image side used when sampling dominant colors
+COLOR_SAMPLE_SIZE = 32
+# Number of evenly spaced frames sampled for dominant colors
+COLOR_SAMPLE_FRAMES = 4
+# Scan results are written to the database in batches of this size
+SCAN_COMMIT_BATCH = 100
+# Worker processes of a scan; kept small, since the first scan runs while the overlay starts up
+DEFAULT_SCAN_WORKERS = min(4, os.cpu_count() or 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    filename TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    frame_count INTEGER,
+    duration_ms INTEGER,
+    bbox TEXT,
+    dominant_colors TEXT,
+    error TEXT,
+    scanned_at REAL
+)
+"""
+_COLUMNS = ('filename', 'width', 'height', 'frame_count', 'duration_ms', 'bbox', 'dominant_colors', 'error')
+
+def scan_image(path):
+    """Reads the metadata of one image file with Pillow.
+
+    Runs inside a worker process, so it only takes and returns plain values.
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            frame_count = getattr(img, 'n_frames', 1)
+            duration_ms = 0
+            bbox = None
+            color_counts = {}
+            sample_step = max(1, frame_count // COLOR_SAMPLE_FRAMES)
+            for index in range(frame_count):
+                if index:
+                    img.seek(index)
+                duration_ms += img.info.get('duration', 0) or 0
+                frame = img.convert('RGBA')
+                if index % sample_step == 0:
+                    _count_colors(frame, color_counts)
+                # Union of the visible (non-transparent) area of all frames
+                frame_bbox = frame.getchannel('A').getbbox()
+                if frame_bbox:
+                    if bbox is None:
+                        bbox = list(frame_bbox)
+                    else:
+                        bbox = [min(bbox[0], frame_bbox[0]), min(bbox[1], frame_bbox[1]),
+                                max(bbox[2], frame_bbox[2]), max(bbox[3], frame_bbox[3])]
+            ranked = sorted(color_counts.items(), key=lambda item: item[1], reverse=True)
+            dominant_colors = ['#{:02X}{:02X}{:02X}'.format(*rgb) for rgb, _ in ranked[:DOMINANT_COLOR_COUNT]]
+        return {
+            'width': width,
+            'height': height,
+            'frame_count': frame_count,
+            'duration_ms': duration_ms,
+            'bbox': bbox,
+            'dominant_colors': dominant_colors,
+            'error': None,
+        }
+    except Exception as e:
+        return {'width': None, 'height': None, 'frame_count': None, 'duration_ms': None,
+                'bbox': None, 'dominant_colors': [], 'error': str(e)}
+
+def _count_colors(rgba_image, counts):
+    """Adds the opaque colors of a downscaled copy of an image to a color histogram."""
+    sample = rgba_image.copy()
+    sample.thumbnail((COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE), Image.Resampling.NEAREST) # Keep real colors
+    for r, g, b, a in sample.getdata():
+        if a < 128: # Ignore (mostly) transparent pixels
+            continue
+        # Bucket to 5 bits per channel so near-identical shades are counted together
+        key = (r & 0xF8, g & 0xF8, b & 0xF8)
+        counts[key] = counts.get(key, 0) + 1
+
+class PresetMetadataDB:
+    """Persistent SQLite index of preset image metadata.
+
+    Rows are keyed by filename and carry the size/mtime of the file they were
+    scanned from, so a re-scan only opens files that actually changed.
+    """
+    def __init__(self, db_path, max_workers=DEFAULT_SCAN_WORKERS):
+        self._db_path = db_path
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock() # Only one scan at a time
+        self._scanned_generation = None
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def _row_to_dict(self, row):
+        data = dict(zip(_COLUMNS, row))
+        data['bbox'] = json.loads(data['bbox']) if data['bbox'] else None
+        data['dominant_colors'] = json.loads(data['dominant_colors']) if data['dominant_colors'] else []
+        return data
+
+    def get(self, filename):
+        """Returns the stored metadata for one preset, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM presets WHERE filename = ?", (filename,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_many(self, filenames):
+        """Returns {filename: metadata} for every given preset that has been scanned."""
+        filenames = list(filenames)
+        if not filenames:
+            return {}
+        placeholders = ', '.join('?' * len(filenames))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM presets WHERE filename IN ({placeholders})", filenames
+            ).fetchall()
+        return {row[0]: self._row_to_dict(row) for row in rows}
+
+    def _stale_records(self, records):
+        """Returns the subset of catalog records whose size or mtime differ from the database."""
+        with self._lock:
+            known = {filename: (size, mtime_ns) for filename, size, mtime_ns in
+                     self._conn.execute("SELECT filename, size, mtime_ns FROM presets")}
+        stale = {filename: record for filename, record in records.items()
+                 if known.get(filename) != (record['size'], record['mtime_ns'])}
+        removed = [filename for filename in known if filename not in records]
+        return stale, removed
+
+    def _store_rows(self, rows):
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO presets (filename, path, size, mtime_ns, width, height, frame_count, "
+                "duration_ms, bbox, dominant_colors, error, scanned_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def scan(self, records):
+        """Scans changed presets in a process pool and stores the results.
+
+        Args:
+            records: filename -> {'path', 'size', 'mtime_ns'} (see PresetCatalog.records)
+        Returns:
+            Number of files that were (re-)scanned.
+        """
+        with self._scan_lock:
+            stale, removed = self._stale_records(records)
+            if removed:
+                with self._lock:
+                    self._conn.executemany("DELETE FROM presets WHERE filename = ?", [(f,) for f in removed])
+                    self._conn.commit()
+            if not stale:
+                return 0
+
+            logger.debug("Preset metadata scan: %d changed file(s), %d removed", len(stale), len(removed))
+            started = time.perf_counter()
+            rows = []
+            with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = {executor.submit(scan_image, record['path']): filename
+                           for filename, record in stale.items()}
+                for future in as_completed(futures):
+                    filename = futures[future]
+                    record = stale[filename]
+                    meta = future.result()
+                    rows.append((
+                        filename, record['path'], record['size'], record['mtime_ns'],
+                        meta['width'], meta['height'], meta['frame_count'], meta['duration_ms'],
+                        json.dumps(meta['bbox']) if meta['bbox'] else None,
+                        json.dumps(meta['dominant_colors']),
+                        meta['error'], time.time(),
+                    ))
+                    if len(rows) >= SCAN_COMMIT_BATCH: # Make results visible while the scan runs
+                        self._store_rows(rows)
+                        rows = []
+            self._store_rows(rows)
+            logger.debug("Preset metadata scan finished in %.1fs", time.perf_counter() - started)
+            return len(stale)
+
+    def scan_in_background(self, catalog):
+        """Starts a background scan if the catalog changed since the last one."""
+        generation = catalog.generation
+        if generation == self._scanned_generation or self._scan_lock.locked():
+            return
+        self._scanned_generation = generation
+
+        def _run():
+            try:
+                self.scan(catalog.records())
+            except Exception as e:
+                logger.error("Preset metadata scan failed: %s", e)
+                self._scanned_generation = None # Allow a retry on the next request
+
+        threading.Thread(target=_run, daemon=True).start()
+
@@ -1,20 +1,32 @@
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, jsonify, render_template, request
 import threading
 import os
 import json
 import re
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 from PIL import Image
 from PySide6.QtCore import QMetaObject, Qt, Q_ARG
-import copy
 import shutil
 import sys
+import logging
+from preset_catalog import PresetCatalog
+from preset_db import PresetMetadataDB, PRESET_DB_FILENAME
+from http_cache import FileValidatorIndex, send_cached_file
+from thumbnails import ThumbnailCache, THUMBNAIL_FOLDER, DEFAULT_THUMBNAIL_SIZE
+from settings_model import CrosshairSettings, SettingsError
+from log import get_logger, get_rate_limited_logger, setup_logging, set_level, get_level, LEVELS
+
+logger = get_logger(__name__)
+hot_logger = get_rate_limited_logger(__name__) # Per-request messages of frequently polled routes
 
 # --- Constants --- 
 PROFILES_FOLDER = 'profiles'
 UPLOAD_FOLDER = 'uploads'
 PRESETS_FOLDER = 'presets'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'gif'}
+THUMBNAIL_MAX_AGE = 30 * 24 * 3600 # Seconds browsers may reuse a thumbnail without asking again
+MAX_SETTINGS_WAIT = 60 # Longest a /get_settings long poll is held open, in seconds
 
 # --- Resource Path Handling ---
 def get_resource_path(relative_path):
@@ -22,27 +34,34 @@ def get_resource_path(relative_path):
     try:
         # PyInstaller creates a temp folder and stores path in _MEIPASS
         base_path = sys._MEIPASS
-        print(f"[DEBUG] Using PyInstaller _MEIPASS path: {base_path}")
+        logger.debug("Using PyInstaller _MEIPASS path: %s", base_path)
     except Exception:
         # If not running as bundled executable, use the script's directory
         base_path = os.path.abspath(os.path.dirname(__file__))
         if os.path.basename(base_path) == 'src':
             # If we're in src folder and trying to access resources in parent dir
             base_path = os.path.abspath(os.path.join(base_path, '..'))
-        print(f"[DEBUG] Using development path: {base_path}")
+        logger.debug("Using development path: %s", base_path)
     
     full_path = os.path.join(base_path, relative_path)
-    print(f"[DEBUG] Resolved path: {full_path} (exists: {os.path.exists(full_path)})")
+    if logger.isEnabledFor(logging.DEBUG): # Skip the stat() otherwise
+        logger.debug("Resolved path: %s (exists: %s)", full_path, os.path.exists(full_path))
     return full_path
 
 # --- Global Variables --- 
 state_manager_ref = None
 update_callback_ref = None
+overlay_ref = None
 _main_window_ref = None
 _project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) 
 _upload_folder_path = None
 _profiles_folder_path = None
 _presets_folder_path = None
+_preset_catalog = None
+_preset_db = None
+_thumbnail_cache = None
+_file_validators = FileValidatorIndex() # ETag/Last-Modified of served uploads
+_data_folder_path = None # User data dir (or app dir) for caches and indexes
 _template_folder_path = get_resource_path('templates')
 _static_folder_path = get_resource_path('static')
 app = Flask(__name__, 
@@ -54,6 +73,56 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_preset_locations():
+    """Returns every existing folder that may contain preset files, primary folder first."""
+    candidate_paths = [_presets_folder_path]
+
+    # Check alternative paths if in PyInstaller bundle
+    if hasattr(sys, '_MEIPASS'):
+        candidate_paths.extend([
+            os.path.join(sys._MEIPASS, 'presets'),
+            os.path.join(sys._MEIPASS, 'static', 'presets'),
+            os.path.join(os.path.dirname(sys.executable), 'presets') # Also check folder next to exe
+        ])
+
+    # Check internal directory path if it exists (often used in builds)
+    internal_dir = os.path.join(os.path.dirname(sys.executable), "_internal")
+    candidate_paths.append(os.path.join(internal_dir, PRESETS_FOLDER))
+
+    return [path for path in candidate_paths if path and os.path.isdir(path)]
+
+def get_preset_catalog():
+    """Returns the shared preset catalog, creating it on first use."""
+    global _preset_catalog
+    if _preset_catalog is None:
+        _preset_catalog = PresetCatalog(get_preset_locations())
+    return _preset_catalog
+
+def send_file_with_validators(directory, filename, mimetype=None, immutable=False):
+    """Like send_from_directory, but with indexed ETag/Last-Modified validators and 304 handling."""
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        return f"File not found: {filename}", 404
+    etag, mtime = _file_validators.get(path)
+    return send_cached_file(path, etag, mtime, mimetype=mimetype, immutable=immutable)
+
+def attach_preset_metadata(catalog, presets):
+    """Merges stored image metadata (dimensions, frames, colors) into preset dicts without opening any file."""
+    if not _preset_db:
+        return presets
+    _preset_db.scan_in_background(catalog) # No-op unless the catalog changed
+    metadata = _preset_db.get_many(p['filename'] for p in presets)
+    return [{**p, **metadata.get(p['filename'], {})} for p in presets]
+
+def parse_page_args():
+    """Reads and clamps the page/per_page query arguments used by the preset listings."""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 24, type=int) # Default to 24 presets per page
+    if page < 1: page = 1
+    if per_page < 1: per_page = 1
+    if per_page > 100: per_page = 100 # Add a max limit per page
+    return page, per_page
+
 # Basic profile name validation/sanitization
 def sanitize_profile_name(name):
     # Remove potentially harmful characters, keep alphanumeric, spaces, hyphens, underscores
@@ -64,65 +133,24 @@ def sanitize_profile_name(name):
     return name[:50] # Limit to 50 chars
 
 def validate_settings(data):
-    """Validates the structure and basic types of the settings dictionary.
-    Raises ValueError on failure.
+    """Validates the structure and types of a settings dictionary.
+
+    Returns:
+        CrosshairSettings: the parsed settings (use .to_dict() to store them)
+    Raises:
+        SettingsError (a ValueError) listing every problem found.
+    """
+    return CrosshairSettings.from_dict(data)
+
+def notify_overlay(revision):
+    """Tells the overlay that settings revision is committed.
+
+    Only the revision number crosses threads; the overlay reads the
+    immutable snapshot from the StateManager itself, and a revision still
+    waiting to be applied is replaced by the newer one.
     """
-    if not isinstance(data, dict):
-        raise ValueError("Settings must be a dictionary.")
-
-    # Validate top-level type
-    valid_types = {'parametric', 'static', 'animated'}
-    if 'type' not in data or data['type'] not in valid_types:
-        raise ValueError(f"Invalid or missing 'type'. Must be one of {valid_types}.")
-
-    # Validate sub-dictionaries exist
-    for key in valid_types:
-        if key not in data or not isinstance(data[key], dict):
-            raise ValueError(f"Missing or invalid '{key}' settings dictionary.")
-
-    # --- Detailed Parametric Validation --- 
-    p = data['parametric']
-    bool_keys_p = ['center_dot_enabled', 'inner_lines_enabled', 'outer_lines_enabled', 'outline_enabled', 't_shape']
-    num_keys_p = ['center_dot_size', 'center_dot_opacity', 'inner_lines_thickness', 
-                    'inner_lines_length', 'inner_lines_gap', 'inner_lines_opacity',
-                    'outer_lines_thickness', 'outer_lines_length', 'outer_lines_gap', 
-                    'outer_lines_opacity', 'outline_thickness', 'outline_opacity']
-    color_keys_p = ['center_dot_color', 'inner_lines_color', 'outer_lines_color', 'outline_color']
-
-    for key in bool_keys_p: 
-        if key not in p or not isinstance(p[key], bool): raise ValueError(f"Parametric setting '{key}' must be a boolean.")
-    for key in num_keys_p:
-        if key not in p or not isinstance(p[key], (int, float)): raise ValueError(f"Parametric setting '{key}' must be a number.")
-        if 'opacity' in key and not (0 <= p[key] <= 255): raise ValueError(f"Parametric opacity '{key}' must be between 0 and 255.")
-        # Add more range checks if needed (e.g., size/thickness >= 0)
-        if ('size' in key or 'thickness' in key or 'length' in key or 'gap' in key) and p[key] < 0: 
-             raise ValueError(f"Parametric dimension '{key}' cannot be negative.")
-    for key in color_keys_p:
-         if key not in p or not isinstance(p[key], str) or not re.match(r'^#[0-9A-Fa-f]{6}$', p[key]): 
-              raise ValueError(f"Parametric color '{key}' must be a valid hex string (e.g., #RRGGBB).")
-
-    # --- Detailed Static Validation --- 
-    s = data['static']
-    if 'image_path' not in s or not (isinstance(s['image_path'], str) or s['image_path'] is None):
-        raise ValueError("Static setting 'image_path' must be a string or null.")
-    if 'opacity' not in s or not isinstance(s['opacity'], (int, float)) or not (0 <= s['opacity'] <= 255):
-        raise ValueError("Static setting 'opacity' must be a number between 0 and 255.")
-    if 'scale' not in s or not isinstance(s['scale'], (int, float)) or s['scale'] <= 0:
-         raise ValueError("Static setting 'scale' must be a positive number.")
-
-    # --- Detailed Animated Validation --- 
-    a = data['animated']
-    if 'gif_path' not in a or not (isinstance(a['gif_path'], str) or a['gif_path'] is None):
-        raise ValueError("Animated setting 'gif_path' must be a string or null.")
-    if 'opacity' not in a or not isinstance(a['opacity'], (int, float)) or not (0 <= a['opacity'] <= 255):
-        raise ValueError("Animated setting 'opacity' must be a number between 0 and 255.")
-    if 'scale' not in a or not isinstance(a['scale'], (int, float)) or a['scale'] <= 0:
-         raise ValueError("Animated setting 'scale' must be a positive number.")
-    if 'speed' not in a or not isinstance(a['speed'], (int, float)) or a['speed'] <= 0:
-         raise ValueError("Animated setting 'speed' must be a positive number.")
-
-    # Add more checks as needed...
-    return True # Validation passed
+    if update_callback_ref:
+        update_callback_ref(revision) # Thread-safe; the overlay applies it on the GUI thread
 
 # --- Routes --- 
 
@@ -130,26 +158,17 @@ def validate_settings(data):
 def index():
     """Serves the main HTML configuration page."""
     try:
-        # Debug info about template location
-        print(f"[DEBUG] Looking for template in: {app.template_folder}")
-        template_path = os.path.join(app.template_folder, 'index.html')
-        print(f"[DEBUG] Full template path: {template_path}")
-        print(f"[DEBUG] Template exists: {os.path.exists(template_path)}")
-        
-        # List all templates for debugging
-        print(f"[DEBUG] Templates directory contents:")
-        try:
-            if os.path.exists(app.template_folder):
-                for item in os.listdir(app.template_folder):
-                    print(f"  - {item}")
-            else:
-                print(f"  Templates directory not found")
-        except Exception as e:
-            print(f"  Error listing templates: {e}")
-        
+        if logger.isEnabledFor(logging.DEBUG): # Only touch the disk when debugging template lookup
+            template_path = os.path.join(app.template_folder, 'index.html')
+            logger.debug("Template path: %s (exists: %s)", template_path, os.path.exists(template_path))
+            try:
+                logger.debug("Templates directory contents: %s", os.listdir(app.template_folder))
+            except OSError as e:
+                logger.debug("Error listing templates: %s", e)
+
         return render_template('index.html')
     except Exception as e:
-        print(f"Error rendering template: {e}")
+        logger.error("Error rendering template: %s", e)
         error_html = f"""
         <h1>Crosshair Configurator</h1>
         <p>Error loading Web UI. Template not found or invalid.</p>
@@ -168,47 +187,47 @@ def serve_upload(filename):
     """Serves uploaded files for preview."""
     try:
         # Debug the request
-        print(f"[DEBUG] Serving uploaded file: {filename}")
-        print(f"[DEBUG] Looking in uploads folder: {_upload_folder_path}")
+        hot_logger.debug("Serving uploaded file: %s", filename)
+        hot_logger.debug("Looking in uploads folder: %s", _upload_folder_path)
         
         # Check if the file exists in the uploads folder
         file_path = os.path.join(_upload_folder_path, filename)
         if os.path.exists(file_path):
-            print(f"[DEBUG] Found file at: {file_path}")
-            return send_from_directory(_upload_folder_path, filename)
+            hot_logger.debug("Found file at: %s", file_path)
+            return send_file_with_validators(_upload_folder_path, filename)
         
         # If not found, try looking in presets folder too
-        print(f"[DEBUG] File not found in uploads, checking presets...")
+        logger.debug("File not found in uploads, checking presets...")
         preset_file_path = os.path.join(_presets_folder_path, filename)
         if os.path.exists(preset_file_path):
-            print(f"[DEBUG] Found file in presets: {preset_file_path}")
+            logger.debug("Found file in presets: %s", preset_file_path)
             # Copy the file to uploads folder for future use
             try:
                 os.makedirs(_upload_folder_path, exist_ok=True)
                 shutil.copy2(preset_file_path, file_path)
-                print(f"[DEBUG] Copied from presets to uploads: {file_path}")
+                logger.debug("Copied from presets to uploads: %s", file_path)
             except Exception as e:
-                print(f"[WARNING] Could not copy preset to uploads: {e}")
+                logger.warning("Could not copy preset to uploads: %s", e)
             
             # Serve from presets folder
-            return send_from_directory(os.path.dirname(preset_file_path), os.path.basename(preset_file_path))
+            return send_file_with_validators(os.path.dirname(preset_file_path), os.path.basename(preset_file_path))
         
         # Check in _internal directory if it exists
         internal_dir = os.path.join(os.path.dirname(sys.executable), "_internal")
         if os.path.exists(internal_dir):
             internal_presets = os.path.join(internal_dir, PRESETS_FOLDER, filename)
             if os.path.exists(internal_presets):
-                print(f"[DEBUG] Found file in internal presets: {internal_presets}")
+                logger.debug("Found file in internal presets: %s", internal_presets)
                 # Copy to uploads folder for future use
                 try:
                     os.makedirs(_upload_folder_path, exist_ok=True)
                     shutil.copy2(internal_presets, file_path)
-                    print(f"[DEBUG] Copied from internal presets to uploads: {file_path}")
+                    logger.debug("Copied from internal presets to uploads: %s", file_path)
                 except Exception as e:
-                    print(f"[WARNING] Could not copy internal preset to uploads: {e}")
+                    logger.warning("Could not copy internal preset to uploads: %s", e)
                 
                 # Serve from internal presets
-                return send_from_directory(os.path.dirname(internal_presets), os.path.basename(internal_presets))
+                return send_file_with_validators(os.path.dirname(internal_presets), os.path.basename(internal_presets))
         
         # If still not found, check in PyInstaller locations if applicable
         if hasattr(sys, '_MEIPASS'):
@@ -220,34 +239,98 @@ def serve_upload(filename):
             
             for location in meipass_locations:
                 if os.path.exists(location):
-                    print(f"[DEBUG] Found file in PyInstaller bundle: {location}")
+                    logger.debug("Found file in PyInstaller bundle: %s", location)
                     # Copy to uploads folder for future use
                     try:
                         os.makedirs(_upload_folder_path, exist_ok=True)
                         shutil.copy2(location, file_path)
-                        print(f"[DEBUG] Copied from bundle to uploads: {file_path}")
+                        logger.debug("Copied from bundle to uploads: %s", file_path)
                     except Exception as e:
-                        print(f"[WARNING] Could not copy bundled file to uploads: {e}")
+                        logger.warning("Could not copy bundled file to uploads: %s", e)
                     
                     # Serve from bundle
-                    return send_from_directory(os.path.dirname(location), os.path.basename(location))
+                    return send_file_with_validators(os.path.dirname(location), os.path.basename(location))
         
         # If we get here, file was not found anywhere
-        print(f"[ERROR] File not found in any location: {filename}")
+        logger.error("File not found in any location: %s", filename)
         return f"File not found: {filename}", 404
         
     except Exception as e:
-        print(f"[ERROR] Error serving uploaded file: {e}")
+        logger.error("Error serving uploaded file: %s", e)
         return str(e), 500
 
 @app.route('/get_settings')
 def get_settings():
-    """Returns the current crosshair settings."""
-    if state_manager_ref:
-        settings = state_manager_ref.get_settings()
-        return jsonify(settings)
-    else:
+    """Returns the current crosshair settings, with their revision in the X-Settings-Revision header.
+
+    With ?since=<revision>, only answers once the settings revision is
+    different, waiting up to ?wait=<seconds> (long polling). Returns 204
+    No Content if nothing changed in that time. Revisions start over when
+    the app restarts, so a since ahead of the current revision is answered
+    right away with the current settings.
+    """
+    if not state_manager_ref:
         return jsonify({"error": "State manager not initialized"}), 500
+    since = request.args.get('since', type=int)
+    if since is None:
+        revision, settings = state_manager_ref.get_settings_revision()
+    else:
+        wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_SETTINGS_WAIT)
+        revision, settings = state_manager_ref.wait_for_change(since, wait)
+        if revision == since:
+            response = app.response_class(status=204)
+            response.headers['X-Settings-Revision'] = str(revision)
+            return response
+    response = jsonify(settings.to_dict())
+    response.headers['X-Settings-Revision'] = str(revision)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/overlay_stats')
+def overlay_stats():
+    """Returns playback statistics reported by the overlay (frame pacing etc.) and config write counters."""
+    if not overlay_ref:
+        return jsonify({"error": "Overlay not initialized"}), 500
+    stats = overlay_ref.collect_playback_stats() # Read on the GUI thread
+    if stats is None:
+        return jsonify({"error": "Overlay did not respond"}), 503
+    response = {"success": True, "stats": stats}
+    if state_manager_ref:
+        response["persistence"] = state_manager_ref.get_persistence_stats()
+    return jsonify(response)
+
+@app.route('/overlay_fps', methods=['GET', 'POST'])
+def overlay_fps():
+    """Gets or sets the cap on animation repaints per second (0 = match the display refresh rate)."""
+    if not state_manager_ref or not overlay_ref:
+        return jsonify({"error": "Overlay not initialized"}), 500
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        max_fps = data.get('max_fps')
+        if not isinstance(max_fps, int) or isinstance(max_fps, bool) or not (0 <= max_fps <= 1000):
+            return jsonify({"error": "'max_fps' must be an integer between 0 and 1000 (0 = match display)."}), 400
+        state_manager_ref.update_app_config('max_overlay_fps', max_fps)
+        QMetaObject.invokeMethod(
+            overlay_ref,
+            "set_max_fps",
+            Qt.ConnectionType.QueuedConnection,
+            Q_ARG(int, max_fps)
+        )
+    return jsonify({"success": True, "max_fps": state_manager_ref.get_app_config().get('max_overlay_fps', 0)})
+
+@app.route('/log_level', methods=['GET', 'POST'])
+def log_level():
+    """Gets or sets the level of the application log (DEBUG, INFO, WARNING or ERROR), without a restart."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            set_level(data.get('level'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if state_manager_ref:
+            state_manager_ref.update_app_config('log_level', get_level())
+        logger.info("Log level set to %s", get_level())
+    return jsonify({"success": True, "level": get_level(), "levels": list(LEVELS)})
 
 @app.route('/update_settings', methods=['POST'])
 def update_settings():
@@ -259,29 +342,49 @@ def update_settings():
 
     if state_manager_ref and update_callback_ref:
         try:
-            validate_settings(new_settings)
-            settings_copy = copy.deepcopy(new_settings)
+            parsed = validate_settings(new_settings)
             
             # --- Update State --- 
-            state_manager_ref.update_settings(settings_copy)
+            revision, _ = state_manager_ref.update_settings(parsed)
             
-            # --- Schedule GUI Update (passing JSON string) --- 
-            settings_json = json.dumps(settings_copy)
-            QMetaObject.invokeMethod(
-                update_callback_ref.__self__,
-                "update_crosshair",
-                Qt.ConnectionType.QueuedConnection,
-                Q_ARG(str, settings_json) # Pass as string
-            )
-            # ------------------------------------------------ 
+            # --- Schedule GUI Update --- 
+            notify_overlay(revision)
             
-            return jsonify({"success": True, "message": "Settings update queued"})
+            return jsonify({"success": True, "message": "Settings update queued", "revision": revision})
         
-        except ValueError as ve:
-             print(f"Settings validation failed: {ve}")
-             return jsonify({"error": "Invalid settings received", "details": str(ve)}), 400
+        except SettingsError as ve:
+             logger.warning("Settings validation failed: %s", ve)
+             return jsonify({"error": "Invalid settings received", "details": str(ve), "errors": ve.errors}), 400
         except Exception as e:
-            print(f"Error processing settings update: {e}")
+            logger.error("Error processing settings update: %s", e)
+            return jsonify({"error": "Failed to process settings update", "details": "An internal server error occurred."}), 500
+    else:
+        return jsonify({"error": "Server components not initialized"}), 500
+
+@app.route('/settings', methods=['PATCH'])
+def patch_settings():
+    """Applies a JSON merge patch (RFC 7396) to the settings, e.g. {"parametric": {"center_dot_size": 4}}.
+
+    Only the fields in the patch are validated, and the patch is merged
+    into the current settings atomically. Returns the new revision.
+    """
+    if not request.is_json: # application/json or application/merge-patch+json
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    patch = request.get_json()
+
+    if state_manager_ref and update_callback_ref:
+        try:
+            changes = CrosshairSettings.parse_patch(patch)
+            revision, _ = state_manager_ref.merge_settings(changes)
+            notify_overlay(revision)
+            return jsonify({"success": True, "message": "Settings update queued", "revision": revision})
+
+        except SettingsError as ve:
+             logger.warning("Settings patch rejected: %s", ve)
+             return jsonify({"error": "Invalid settings patch", "details": str(ve), "errors": ve.errors}), 400
+        except Exception as e:
+            logger.error("Error applying settings patch: %s", e)
             return jsonify({"error": "Failed to process settings update", "details": "An internal server error occurred."}), 500
     else:
         return jsonify({"error": "Server components not initialized"}), 500
@@ -310,7 +413,7 @@ def upload_image():
             if os.path.exists(temp_save_path):
                 try: os.remove(temp_save_path)
                 except OSError as e:
-                    print(f"Warning: Could not remove old temp file {temp_save_path}: {e}")
+                    logger.warning("Could not remove old temp file %s: %s", temp_save_path, e)
             
             # Save to temporary path first
             file.save(temp_save_path)
@@ -324,7 +427,7 @@ def upload_image():
             if os.path.exists(save_path):
                 try:
                     os.remove(save_path)
-                    print(f"Removed existing file: {save_path}")
+                    logger.debug("Removed existing file: %s", save_path)
                 except OSError as e:
                     # If we can't remove the old file, we can't proceed with rename
                     raise OSError(f"Failed to remove existing file {save_path}: {e}") from e
@@ -332,41 +435,27 @@ def upload_image():
 
             # Rename temporary file to final name
             os.rename(temp_save_path, save_path)
-            print(f"File validated and saved to: {save_path}")
+            logger.info("File validated and saved to: %s", save_path)
 
             # --- Prepare settings and Update State --- 
-            current_settings = state_manager_ref.get_settings()
             file_ext = filename.rsplit('.', 1)[1].lower()
             if file_ext == 'gif':
-                current_settings['type'] = 'animated'
-                current_settings['animated']['gif_path'] = filename
-                current_settings['static']['image_path'] = None
+                changes = {'type': 'animated', 'animated': {'gif_path': filename}, 'static': {'image_path': None}}
             else:
-                current_settings['type'] = 'static'
-                current_settings['static']['image_path'] = filename
-                current_settings['animated']['gif_path'] = None
-            
-            settings_to_update = copy.deepcopy(current_settings)
-            state_manager_ref.update_settings(settings_to_update)
-
-            # --- Schedule GUI Update (passing JSON string) --- 
-            settings_json = json.dumps(settings_to_update)
-            QMetaObject.invokeMethod(
-                update_callback_ref.__self__, 
-                "update_crosshair",          
-                Qt.ConnectionType.QueuedConnection, 
-                Q_ARG(str, settings_json) # Pass as string
-            )
-            # ---------------------------------------------
+                changes = {'type': 'static', 'static': {'image_path': filename}, 'animated': {'gif_path': None}}
+            revision, settings_to_update = state_manager_ref.merge_settings(changes)
+
+            # --- Schedule GUI Update --- 
+            notify_overlay(revision)
             
-            return jsonify({"success": True, "message": "File uploaded, update queued", "filename": filename, "new_settings": settings_to_update})
+            return jsonify({"success": True, "message": "File uploaded, update queued", "filename": filename, "new_settings": settings_to_update.to_dict(), "revision": revision})
 
         except Exception as e:
             # Clean up temporary file if it exists
             if os.path.exists(temp_save_path):
                 try: os.remove(temp_save_path)
                 except OSError: pass
-            print(f"Error during file upload/validation/save: {e}") # Modified print
+            logger.error("Error during file upload/validation/save: %s", e)
             # Distinguish between validation/save errors and file removal errors
             error_msg = "File validation or save failed" 
             if isinstance(e, OSError) and "Failed to remove existing file" in str(e):
@@ -394,7 +483,7 @@ def list_profiles():
         # Return with success flag and profiles array
         return jsonify({"success": True, "profiles": profiles})
     except Exception as e:
-        print(f"[ERROR] Exception in list_profiles: {e}")
+        logger.error("Exception in list_profiles: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/save_profile', methods=['POST'])
@@ -402,26 +491,26 @@ def save_profile():
     """Saves the current settings as a named profile."""
     try:
         # Debug the incoming request
-        print(f"[DEBUG] Save profile request received")
-        print(f"[DEBUG] Request content type: {request.content_type}")
-        print(f"[DEBUG] Request has JSON: {request.is_json}")
+        logger.debug("Save profile request received")
+        logger.debug("Request content type: %s", request.content_type)
+        logger.debug("Request has JSON: %s", request.is_json)
         
         # Handle both JSON and form data
         if request.is_json:
             data = request.json
-            print(f"[DEBUG] Request JSON data: {data}")
+            logger.debug("Request JSON data: %s", data)
         else:
             # Try to parse the data from form or raw body
             try:
                 data = request.form.to_dict()
-                print(f"[DEBUG] Request form data: {data}")
+                logger.debug("Request form data: %s", data)
             except Exception:
                 try:
                     # Try to parse raw body as JSON
                     data = json.loads(request.data.decode('utf-8'))
-                    print(f"[DEBUG] Request raw body parsed: {data}")
+                    logger.debug("Request raw body parsed: %s", data)
                 except Exception as e:
-                    print(f"[DEBUG] Failed to parse request data: {e}")
+                    logger.debug("Failed to parse request data: %s", e)
                     data = {}
         
         # Check for required fields
@@ -435,13 +524,13 @@ def save_profile():
             
         if missing_fields:
             error_message = f"Missing {', '.join(missing_fields)}"
-            print(f"[DEBUG] Error: {error_message}")
+            logger.debug("Error: %s", error_message)
             return jsonify({"error": error_message}), 400
             
         # Validate and sanitize profile name
         profile_name = sanitize_profile_name(data['profile_name'])
         if not profile_name:
-            print(f"[DEBUG] Invalid profile name: {data['profile_name']}")
+            logger.debug("Invalid profile name: %s", data['profile_name'])
             return jsonify({"error": "Invalid profile name"}), 400
             
         # Validate settings
@@ -451,29 +540,29 @@ def save_profile():
             if isinstance(settings, str):
                 try:
                     settings = json.loads(settings)
-                    print(f"[DEBUG] Parsed settings from string")
+                    logger.debug("Parsed settings from string")
                 except Exception as e:
-                    print(f"[DEBUG] Failed to parse settings string: {e}")
+                    logger.debug("Failed to parse settings string: %s", e)
                     return jsonify({"error": f"Invalid settings format: {str(e)}"}), 400
                     
             validate_settings(settings)
         except ValueError as e:
-            print(f"[DEBUG] Settings validation failed: {e}")
+            logger.warning("Settings validation failed: %s", e)
             return jsonify({"error": f"Invalid settings: {str(e)}"}), 400
             
         # Ensure profiles directory exists
         os.makedirs(_profiles_folder_path, exist_ok=True)
-        print(f"[DEBUG] Saving profile to: {_profiles_folder_path}")
+        logger.debug("Saving profile to: %s", _profiles_folder_path)
         
         # Save the profile
         profile_path = os.path.join(_profiles_folder_path, f"{profile_name}.json")
         with open(profile_path, 'w') as f:
             json.dump(settings, f)
             
-        print(f"[DEBUG] Profile saved successfully: {profile_name}")
+        logger.debug("Profile saved successfully: %s", profile_name)
         return jsonify({"message": f"Profile {profile_name} saved successfully"})
     except Exception as e:
-        print(f"[ERROR] Exception in save_profile: {e}")
+        logger.error("Exception in save_profile: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/load_profile/<profile_name>')
@@ -493,26 +582,20 @@ def load_profile(profile_name):
         # Load the profile
         with open(profile_path, 'r') as f:
             settings = json.load(f)
+        try:
+            settings = validate_settings(settings) # Also fills in fields added since it was saved
+        except SettingsError as e:
+            return jsonify({"success": False, "error": f"Invalid profile: {e}", "errors": e.errors}), 400
             
         # Update the crosshair settings in the application state
+        revision = None
         if state_manager_ref:
-            # Use copy to avoid modifying the settings by reference
-            settings_to_update = copy.deepcopy(settings)
-            state_manager_ref.update_settings(settings_to_update)
-            
-            # Use JSON string for Qt method invocation, like in other functions
-            if update_callback_ref:
-                settings_json = json.dumps(settings_to_update)
-                QMetaObject.invokeMethod(
-                    update_callback_ref.__self__, 
-                    "update_crosshair",          
-                    Qt.ConnectionType.QueuedConnection, 
-                    Q_ARG(str, settings_json)
-                )
+            revision, settings_to_update = state_manager_ref.update_settings(settings)
+            notify_overlay(revision)
                 
-        return jsonify({"success": True, "settings": settings})
+        return jsonify({"success": True, "settings": settings.to_dict(), "revision": revision})
     except Exception as e:
-        print(f"[ERROR] Error loading profile: {e}")
+        logger.error("Error loading profile: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/delete_profile/<profile_name>', methods=['DELETE'])
@@ -538,100 +621,24 @@ def delete_profile(profile_name):
 @app.route('/list_gif_presets', methods=['GET'])
 def list_gif_presets():
     """Lists available crosshair preset files (GIF/PNG) with pagination."""
+    per_page = 24
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 24, type=int) # Default to 24 presets per page
-        if page < 1: page = 1
-        if per_page < 1: per_page = 1
-        if per_page > 100: per_page = 100 # Add a max limit per page
-        
-        presets_list = []
-        presets_path = _presets_folder_path
-        print(f"[DEBUG] Looking for presets in primary path: {presets_path}")
-        
-        # Consolidate all potential preset locations
-        preset_locations_to_scan = set()
-        if os.path.exists(presets_path) and os.path.isdir(presets_path):
-            preset_locations_to_scan.add(presets_path)
-        
-        # Check alternative paths if in PyInstaller bundle or primary path is empty/missing
-        if hasattr(sys, '_MEIPASS'):
-            print(f"[DEBUG] Checking PyInstaller paths...")
-            alternative_paths = [
-                os.path.join(sys._MEIPASS, 'presets'),
-                os.path.join(sys._MEIPASS, 'static', 'presets'),
-                os.path.join(os.path.dirname(sys.executable), 'presets') # Also check folder next to exe
-            ]
-            for alt_path in alternative_paths:
-                if os.path.exists(alt_path) and os.path.isdir(alt_path):
-                    print(f"[DEBUG] Found presets at alternative path: {alt_path}")
-                    preset_locations_to_scan.add(alt_path)
-        
-        # Check internal directory path if it exists (often used in builds)
-        internal_dir = os.path.join(os.path.dirname(sys.executable), "_internal")
-        if os.path.exists(internal_dir) and os.path.isdir(internal_dir):
-             internal_presets_path = os.path.join(internal_dir, PRESETS_FOLDER)
-             if os.path.exists(internal_presets_path) and os.path.isdir(internal_presets_path):
-                 print(f"[DEBUG] Found presets at internal path: {internal_presets_path}")
-                 preset_locations_to_scan.add(internal_presets_path)
-        
-        # If no locations found, return empty
-        if not preset_locations_to_scan:
-            print("[DEBUG] No presets directory found after trying alternatives")
+        page, per_page = parse_page_args()
+
+        catalog = get_preset_catalog()
+        if not catalog.locations:
+            logger.debug("No presets directory found after trying alternatives")
             return jsonify({"success": False, "presets": [], "error": "No presets found", "total_presets": 0, "page": page, "per_page": per_page})
-            
-        # Scan all found locations for preset files
-        found_presets_map = {}  # Use dict to avoid duplicates based on filename
-        print(f"[DEBUG] Scanning locations: {list(preset_locations_to_scan)}") # Log actual list
-        total_files_scanned = 0
-        total_presets_found_before_dedup = 0
-        
-        for search_path in preset_locations_to_scan:
-            print(f"[DEBUG] --- Scanning Path: {search_path} ---")
-            try:
-                items_in_dir = os.listdir(search_path)
-                print(f"[DEBUG] Found {len(items_in_dir)} items in {search_path}")
-                total_files_scanned += len(items_in_dir)
-                
-                for filename in items_in_dir:
-                    if filename.lower().endswith(('.gif', '.png')):
-                        total_presets_found_before_dedup += 1
-                        # Use filename as key to handle potential duplicates across scanned folders
-                        if filename not in found_presets_map:
-                            try:
-                                file_path = os.path.join(search_path, filename)
-                                if os.path.isfile(file_path): # Ensure it's a file
-                                    file_size = os.path.getsize(file_path) / 1024  # Convert to KB
-                                    preset_name = os.path.splitext(filename)[0]
-                                    preset_data = {
-                                        'name': preset_name,
-                                        'filename': filename,
-                                        'size_kb': round(file_size, 1),
-                                        'extension': os.path.splitext(filename)[1][1:].upper(),
-                                    }
-                                    found_presets_map[filename] = preset_data
-                            except Exception as e:
-                                print(f"[WARN] Error processing file {filename} in {search_path}: {e}")
-                        # else: print(f"[DEBUG] Duplicate preset skipped: {filename}") # Optional: log duplicates
-                    # else: print(f"[DEBUG] Non-preset file skipped: {filename}") # Optional: log skips
-            except Exception as e:
-                print(f"[WARN] Error listing directory {search_path}: {e}")
-        
-        print(f"[DEBUG] Total items seen across all directories: {total_files_scanned}")
-        print(f"[DEBUG] Total .gif/.png files found (before deduplication): {total_presets_found_before_dedup}")
-        print(f"[DEBUG] Total unique presets added to map: {len(found_presets_map)}")
-
-        # Convert to list and sort
-        all_presets = sorted(list(found_presets_map.values()), key=lambda x: x['name'])
-        total_presets = len(all_presets)
-        print(f"[DEBUG] Final total unique presets after sorting: {total_presets}.")
-        
-        # Calculate pagination slice
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        paginated_presets = all_presets[start_index:end_index]
-        
-        print(f"[DEBUG] Returning page {page} ({len(paginated_presets)} presets)")
+
+        # The catalog only re-scans when a preset folder changed, so this is a slice
+        paginated_presets, total_presets = catalog.page(page, per_page)
+
+        paginated_presets = attach_preset_metadata(catalog, paginated_presets)
+
+        # Start rendering this page's thumbnails before the browser asks for them
+        if _thumbnail_cache:
+            _thumbnail_cache.prefetch(filter(None, (catalog.lookup(p['filename']) for p in paginated_presets)))
+
         return jsonify({
             "success": True, 
             "presets": paginated_presets, 
@@ -640,9 +647,94 @@ def list_gif_presets():
             "per_page": per_page
         })
     except Exception as e:
-        print(f"[ERROR] Error listing preset animations: {e}")
+        logger.error("Error listing preset animations: %s", e)
+        return jsonify({"success": False, "presets": [], "error": str(e), "total_presets": 0, "page": 1, "per_page": per_page}), 500
+
+@app.route('/preset_sprites')
+def preset_sprites():
+    """Returns a page of presets plus the offset map of a sprite sheet holding all their thumbnails."""
+    per_page = 24
+    try:
+        page, per_page = parse_page_args()
+        size = request.args.get('size', DEFAULT_THUMBNAIL_SIZE, type=int)
+        if size < 1:
+            size = DEFAULT_THUMBNAIL_SIZE
+        if not _thumbnail_cache:
+            return jsonify({"success": False, "error": "Thumbnail cache not initialized"}), 500
+
+        catalog = get_preset_catalog()
+        paginated_presets, total_presets = catalog.page(page, per_page)
+        records = []
+        for preset in paginated_presets:
+            record = catalog.lookup_record(preset['filename'])
+            if record:
+                record['filename'] = preset['filename']
+                records.append(record)
+
+        # Built on first request and cached on disk under a hash of the page's files and versions
+        sprite = _thumbnail_cache.get_sprite_sheet(records, size)
+        sprite['url'] = f"/preset_sprites/{sprite['key']}.png"
+
+        return jsonify({
+            "success": True,
+            "presets": attach_preset_metadata(catalog, paginated_presets),
+            "total_presets": total_presets,
+            "page": page,
+            "per_page": per_page,
+            "sprite": sprite
+        })
+    except Exception as e:
+        logger.error("Error building preset sprite sheet: %s", e)
         return jsonify({"success": False, "presets": [], "error": str(e), "total_presets": 0, "page": 1, "per_page": per_page}), 500
 
+@app.route('/preset_sprites/<key>.png')
+def preset_sprite_image(key):
+    """Serves a generated sprite sheet. The key is a content hash, so it never changes."""
+    path = _thumbnail_cache.sprite_image_path(key) if _thumbnail_cache else None
+    if not path:
+        return f"Sprite sheet not found: {key}", 404
+    etag, mtime = _file_validators.get(path)
+    return send_cached_file(path, etag, mtime, mimetype='image/png', immutable=True)
+
+@app.route('/preset_info/<filename>')
+def preset_info(filename):
+    """Returns the indexed metadata of a single preset."""
+    filename = os.path.basename(filename)
+    if not _preset_db:
+        return jsonify({"success": False, "error": "Preset index not initialized"}), 500
+    metadata = _preset_db.get(filename)
+    if metadata is None:
+        return jsonify({"success": False, "error": f"No metadata for preset: {filename}"}), 404
+    return jsonify({"success": True, "preset": metadata})
+
+@app.route('/preset_thumb/<filename>')
+def preset_thumb(filename):
+    """Serves a cached, downscaled thumbnail of a preset (static poster or short animated preview)."""
+    filename = os.path.basename(filename)
+    size = request.args.get('size', DEFAULT_THUMBNAIL_SIZE, type=int)
+    animated = request.args.get('animated', 0, type=int) == 1
+    if size < 1:
+        size = DEFAULT_THUMBNAIL_SIZE
+
+    record = get_preset_catalog().lookup_record(filename)
+    if not record:
+        return f"Preset file not found: {filename}", 404
+    if not _thumbnail_cache:
+        return "Thumbnail cache not initialized", 500
+
+    try:
+        thumb_path = _thumbnail_cache.get(record['path'], size, animated)
+    except Exception as e:
+        logger.error("Error generating thumbnail for %s: %s", filename, e)
+        return f"Could not generate thumbnail: {filename}", 500
+
+    # Only a URL carrying the preset's current version (?v=, the 'version' of listed presets) may be
+    # reused without asking; any other one must be revalidated, since the preset can be overwritten in place
+    versioned = request.args.get('v') == record['etag']
+    etag, mtime = _file_validators.get(thumb_path)
+    return send_cached_file(thumb_path, etag, mtime, mimetype='image/gif' if animated else 'image/png',
+                            max_age=THUMBNAIL_MAX_AGE if versioned else 0)
+
 @app.route('/get_preset/<filename>')
 def get_preset(filename):
     """Serves a preset animation file."""
@@ -653,10 +745,16 @@ def get_preset(filename):
     filename = os.path.basename(filename)
     
     try:
-        # Debug info
-        print(f"[DEBUG] Requested preset: {filename}")
-        print(f"[DEBUG] Looking in presets folder: {_presets_folder_path}")
-        
+        mimetype = 'image/gif' if filename.endswith('.gif') else 'image/png'
+
+        # Indexed presets need no probing of the fallback locations below. The URL is not
+        # versioned and presets can be overwritten in place, so the validators come from a
+        # fresh stat and browsers must revalidate (a matching If-None-Match is a cheap 304)
+        preset_path = get_preset_catalog().lookup(filename)
+        if preset_path:
+            etag, mtime = _file_validators.get(preset_path)
+            return send_cached_file(preset_path, etag, mtime, mimetype=mimetype)
+
         # Possible locations to check (same as in list_gif_presets)
         possible_locations = [
             os.path.join(_presets_folder_path, filename),
@@ -676,23 +774,19 @@ def get_preset(filename):
         
         # Check all possible locations
         for location in possible_locations:
-            print(f"[DEBUG] Checking location: {location}")
             if os.path.exists(location):
-                preset_path = location
-                print(f"[DEBUG] Found preset at: {preset_path}")
-                # Use send_from_directory with the directory and filename
-                return send_from_directory(
-                    os.path.dirname(preset_path),
-                    os.path.basename(preset_path),
-                    as_attachment=False,
-                    mimetype='image/gif' if filename.endswith('.gif') else 'image/png'
+                logger.debug("Found preset at: %s", location)
+                return send_file_with_validators(
+                    os.path.dirname(location),
+                    os.path.basename(location),
+                    mimetype=mimetype
                 )
         
-        print(f"[DEBUG] Preset not found in any location: {filename}")
+        logger.debug("Preset not found in any location: %s", filename)
         return f"Preset file not found: {filename}", 404
         
     except Exception as e:
-        print(f"[ERROR] Error serving preset: {e}")
+        logger.error("Error serving preset: %s", e)
         return str(e), 404
 
 @app.route('/apply_gif_preset', methods=['POST'])
@@ -712,8 +806,8 @@ def apply_gif_preset():
     
     try:
         # Debug info
-        print(f"[DEBUG] Applying preset: {preset_filename}")
-        print(f"[DEBUG] Looking in presets folder: {_presets_folder_path}")
+        logger.debug("Applying preset: %s", preset_filename)
+        logger.debug("Looking in presets folder: %s", _presets_folder_path)
         
         # Possible locations to check - same as in get_preset
         possible_locations = [
@@ -735,10 +829,10 @@ def apply_gif_preset():
         # Check all possible locations
         preset_path = None
         for location in possible_locations:
-            print(f"[DEBUG] Checking location: {location}")
+            logger.debug("Checking location: %s", location)
             if os.path.exists(location):
                 preset_path = location
-                print(f"[DEBUG] Found preset at: {preset_path}")
+                logger.debug("Found preset at: %s", preset_path)
                 break
         
         if not preset_path:
@@ -749,75 +843,62 @@ def apply_gif_preset():
         
         # Copy the preset to the uploads folder
         destination_path = os.path.join(_upload_folder_path, preset_filename)
-        print(f"[DEBUG] Copying preset to: {destination_path}")
+        logger.debug("Copying preset to: %s", destination_path)
         shutil.copy2(preset_path, destination_path)
         
-        # Update settings
-        current_settings = state_manager_ref.get_settings()
-        
-        # Determine if it's a GIF or static image based on extension
+        # Determine if it's a GIF or static image based on extension (and make sure the other one is not used)
         if preset_filename.lower().endswith('.gif'):
-            current_settings['type'] = 'animated'
-            current_settings['animated']['gif_path'] = preset_filename
-            # Make sure static is not used
-            current_settings['static']['image_path'] = None
+            changes = {'type': 'animated', 'animated': {'gif_path': preset_filename}, 'static': {'image_path': None}}
         else:
-            current_settings['type'] = 'static'
-            current_settings['static']['image_path'] = preset_filename
-            # Make sure animated is not used
-            current_settings['animated']['gif_path'] = None
+            changes = {'type': 'static', 'static': {'image_path': preset_filename}, 'animated': {'gif_path': None}}
         
         # Update state
-        settings_to_update = copy.deepcopy(current_settings)
-        state_manager_ref.update_settings(settings_to_update)
+        revision, settings_to_update = state_manager_ref.merge_settings(changes)
         
         # Schedule GUI update
-        settings_json = json.dumps(settings_to_update)
-        QMetaObject.invokeMethod(
-            update_callback_ref.__self__, 
-            "update_crosshair",          
-            Qt.ConnectionType.QueuedConnection, 
-            Q_ARG(str, settings_json)
-        )
+        notify_overlay(revision)
         
         return jsonify({
             "success": True, 
             "message": "Preset applied successfully", 
-            "settings": settings_to_update
+            "settings": settings_to_update.to_dict(),
+            "revision": revision
         })
         
     except Exception as e:
-        print(f"[ERROR] Error applying preset: {e}")
+        logger.error("Error applying preset: %s", e)
         return jsonify({"success": False, "error": "Failed to apply preset", "details": str(e)}), 500
 
 # --- Server Start Function --- 
 
-def start_server(main_window=None, state_manager=None, update_callback=None, port=5000, user_data_dir=None, host='0.0.0.0'):
+def start_server(main_window=None, state_manager=None, update_callback=None, port=5000, user_data_dir=None, host='0.0.0.0', overlay=None):
     """
     Starts the Flask server with optional integration to GUI components.
     
     Args:
         main_window: QMainWindow reference for closing app with API if needed
         state_manager: Reference to the settings/state manager object
-        update_callback: Function to call to update UI after settings change
+        update_callback: Overlay method (post_settings_revision) notified of new settings revisions from any thread
         port: Port number to use (default: 5000)
         user_data_dir: User data directory for uploads, profiles, etc. (default: None)
         host: Host to bind to (default: '0.0.0.0' to listen on all interfaces)
+        overlay: OverlayWidget, for its playback stats and FPS cap (only reached through queued calls)
     """
-    global _main_window_ref, state_manager_ref, update_callback_ref, _upload_folder_path, _profiles_folder_path, _presets_folder_path, _template_folder_path, _static_folder_path
+    global _main_window_ref, state_manager_ref, update_callback_ref, overlay_ref, _upload_folder_path, _profiles_folder_path, _presets_folder_path, _preset_catalog, _preset_db, _thumbnail_cache, _data_folder_path, _template_folder_path, _static_folder_path
     
-    print("[DEBUG] Server starting...")
-    print(f"[DEBUG] Current directory: {os.getcwd()}")
-    print(f"[DEBUG] Script directory: {os.path.dirname(os.path.abspath(__file__))}")
+    logger.debug("Server starting...")
+    logger.debug("Current directory: %s", os.getcwd())
+    logger.debug("Script directory: %s", os.path.dirname(os.path.abspath(__file__)))
     
     # Store references to GUI components if provided
     _main_window_ref = main_window
     state_manager_ref = state_manager
     update_callback_ref = update_callback
+    overlay_ref = overlay
     
     # Detect if we're running in a PyInstaller bundle
     in_pyinstaller = hasattr(sys, '_MEIPASS')
-    print(f"[DEBUG] Running in PyInstaller bundle: {in_pyinstaller}")
+    logger.debug("Running in PyInstaller bundle: %s", in_pyinstaller)
     
     # Set up app folders
     if user_data_dir:
@@ -842,13 +923,13 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
             
             for source_path in source_presets:
                 if os.path.exists(source_path):
-                    print(f"[DEBUG] Found bundled presets in: {source_path}")
+                    logger.debug("Found bundled presets in: %s", source_path)
                     # Copy presets to user directory
                     for item in os.listdir(source_path):
                         if item.lower().endswith(('.gif', '.png')) and os.path.isfile(os.path.join(source_path, item)):
                             source_file = os.path.join(source_path, item)
                             dest_file = os.path.join(_presets_folder_path, item)
-                            print(f"[DEBUG] Copying preset: {item} to user directory")
+                            logger.debug("Copying preset: %s to user directory", item)
                             shutil.copy2(source_file, dest_file)
             
             # If still empty, use bundled presets
@@ -856,7 +937,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
                 bundled_presets = os.path.join(sys._MEIPASS, PRESETS_FOLDER)
                 if os.path.exists(bundled_presets):
                     _presets_folder_path = bundled_presets
-                    print(f"[DEBUG] Using bundled presets: {_presets_folder_path}")
+                    logger.debug("Using bundled presets: %s", _presets_folder_path)
     else:
         # Default to folders in the application directory
         if in_pyinstaller:
@@ -866,7 +947,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
             # Check for _internal folder structure (common in production installations)
             internal_dir = os.path.join(exe_dir, "_internal")
             if os.path.exists(internal_dir) and os.path.isdir(internal_dir):
-                print(f"[DEBUG] Found _internal folder structure: {internal_dir}")
+                logger.debug("Found _internal folder structure: %s", internal_dir)
                 
                 # Use the internal folder for presets
                 _presets_folder_path = os.path.join(internal_dir, PRESETS_FOLDER)
@@ -894,13 +975,13 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
                 
                 for source_path in source_presets:
                     if source_path and os.path.exists(source_path):
-                        print(f"[DEBUG] Found bundled presets in: {source_path}")
+                        logger.debug("Found bundled presets in: %s", source_path)
                         # Copy presets to user directory
                         for item in os.listdir(source_path):
                             if item.lower().endswith(('.gif', '.png')) and os.path.isfile(os.path.join(source_path, item)):
                                 source_file = os.path.join(source_path, item)
                                 dest_file = os.path.join(_presets_folder_path, item)
-                                print(f"[DEBUG] Copying preset: {item} to executable directory")
+                                logger.debug("Copying preset: %s to executable directory", item)
                                 shutil.copy2(source_file, dest_file)
                 
                 # If still empty, use bundled presets
@@ -910,14 +991,14 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
                         internal_presets = os.path.join(internal_dir, PRESETS_FOLDER)
                         if os.path.exists(internal_presets):
                             _presets_folder_path = internal_presets
-                            print(f"[DEBUG] Using internal presets: {_presets_folder_path}")
+                            logger.debug("Using internal presets: %s", _presets_folder_path)
                     
                     # If still not found, try in MEIPASS
                     if not os.path.exists(_presets_folder_path) or not os.listdir(_presets_folder_path):
                         bundled_presets = os.path.join(sys._MEIPASS, PRESETS_FOLDER)
                         if os.path.exists(bundled_presets):
                             _presets_folder_path = bundled_presets
-                            print(f"[DEBUG] Using bundled presets: {_presets_folder_path}")
+                            logger.debug("Using bundled presets: %s", _presets_folder_path)
         else:
             # Development environment
             base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -937,12 +1018,10 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
             _static_folder_path = get_resource_path('static')
             
         # Debug info
-        print(f"[DEBUG] Template folder path: {_template_folder_path}")
-        print(f"[DEBUG] Static folder path: {_static_folder_path}")
-        print(f"[DEBUG] Template folder exists: {os.path.exists(_template_folder_path)}")
-        print(f"[DEBUG] Static folder exists: {os.path.exists(_static_folder_path)}")
+        logger.debug("Template folder path: %s", _template_folder_path)
+        logger.debug("Static folder path: %s", _static_folder_path)
     except Exception as e:
-        print(f"[ERROR] Exception while setting template paths: {e}")
+        logger.error("Exception while setting template paths: %s", e)
         # Fallback to safe defaults
         _template_folder_path = get_resource_path('templates')
         _static_folder_path = get_resource_path('static')
@@ -966,7 +1045,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
     
     # Create default profile files if the profiles directory is empty
     if os.path.exists(_profiles_folder_path) and not os.listdir(_profiles_folder_path):
-        print("[DEBUG] Creating default profile files...")
+        logger.debug("Creating default profile files...")
         
         # Copy selected presets to uploads folder for use in default profiles
         default_presets = [
@@ -977,7 +1056,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
         
         # Ensure uploads directory exists
         os.makedirs(_upload_folder_path, exist_ok=True)
-        print(f"[DEBUG] Ensuring upload folder exists at: {_upload_folder_path}")
+        logger.debug("Ensuring upload folder exists at: %s", _upload_folder_path)
         
         # Create each default profile
         for preset in default_presets:
@@ -1006,7 +1085,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
             for path in possible_preset_locations:
                 if os.path.exists(path):
                     preset_path = path
-                    print(f"[DEBUG] Found preset at: {preset_path}")
+                    logger.debug("Found preset at: %s", preset_path)
                     break
             
             if preset_path:
@@ -1014,7 +1093,7 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
                 dest_file = os.path.join(_upload_folder_path, preset_filename)
                 try:
                     shutil.copy2(preset_path, dest_file)
-                    print(f"[DEBUG] Copied {preset_filename} to uploads folder: {dest_file}")
+                    logger.debug("Copied %s to uploads folder: %s", preset_filename, dest_file)
                     
                     # Create default profile using this preset
                     profile_data = {
@@ -1059,12 +1138,12 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
                     profile_path = os.path.join(_profiles_folder_path, f"{profile_name}.json")
                     with open(profile_path, 'w') as f:
                         json.dump(profile_data, f, indent=4)
-                    print(f"[DEBUG] Created default profile: {profile_name} at {profile_path}")
+                    logger.debug("Created default profile: %s at %s", profile_name, profile_path)
                     
                 except Exception as e:
-                    print(f"[ERROR] Failed to create default profile {profile_name}: {e}")
+                    logger.error("Failed to create default profile %s: %s", profile_name, e)
             else:
-                print(f"[WARNING] Could not find preset file: {preset_filename} in any location")
+                logger.warning("Could not find preset file: %s in any location", preset_filename)
         
         # Also create a default parametric profile
         default_parametric = {
@@ -1109,26 +1188,42 @@ def start_server(main_window=None, state_manager=None, update_callback=None, por
         profile_path = os.path.join(_profiles_folder_path, "Default_Parametric.json")
         with open(profile_path, 'w') as f:
             json.dump(default_parametric, f, indent=4)
-        print(f"[DEBUG] Created default parametric profile at {profile_path}")
+        logger.debug("Created default parametric profile at %s", profile_path)
     
-    print(f"Server starting on port {port}")
-    print(f"Upload folder: {_upload_folder_path}")
-    print(f"Profiles folder: {_profiles_folder_path}")
-    print(f"Presets folder: {_presets_folder_path} (exists: {os.path.exists(_presets_folder_path)})")
-    print(f"Templates folder: {_template_folder_path} (exists: {os.path.exists(_template_folder_path)})")
-    print(f"Static folder: {_static_folder_path} (exists: {os.path.exists(_static_folder_path)})")
+    # Build the preset index once so page requests don't walk the preset folders
+    _preset_catalog = PresetCatalog(get_preset_locations())
+    _preset_catalog.refresh(force=True)
+
+    # Persistent image metadata index, filled in the background
+    _data_folder_path = user_data_dir or os.path.dirname(_upload_folder_path)
+    try:
+        _preset_db = PresetMetadataDB(os.path.join(_data_folder_path, PRESET_DB_FILENAME))
+        _preset_db.scan_in_background(_preset_catalog)
+    except Exception as e:
+        logger.error("Could not open preset metadata index: %s", e)
+        _preset_db = None
+    _thumbnail_cache = ThumbnailCache(os.path.join(_data_folder_path, THUMBNAIL_FOLDER))
+
+    logger.info("Server starting on port %s", port)
+    logger.info("Upload folder: %s", _upload_folder_path)
+    logger.info("Profiles folder: %s", _profiles_folder_path)
+    logger.info("Presets folder: %s (exists: %s)", _presets_folder_path, os.path.exists(_presets_folder_path))
+    logger.info("Templates folder: %s (exists: %s)", _template_folder_path, os.path.exists(_template_folder_path))
+    logger.info("Static folder: %s (exists: %s)", _static_folder_path, os.path.exists(_static_folder_path))
     
     # Start the server in a separate thread
     threading.Thread(target=lambda: app.run(
         host=host, 
         port=port, 
         debug=False, 
-        use_reloader=False
+        use_reloader=False,
+        threaded=True # Each /get_settings long poll holds its own thread
     )).start()
     
     return app
 
 # Example for testing server independently (optional)
 if __name__ == '__main__':
-    print("Starting Flask server directly for testing...")
+    setup_logging()
+    logger.info("Starting Flask server directly for testing...")
     start_server(port=5001) 
\ No newline at end of file
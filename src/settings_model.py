@@ -0,0 +1,323 @@
+import math
+import re
+from abc import ABCMeta
+from collections.abc import Mapping
+from operator import itemgetter
+
+# Colors are '#RRGGBB' strings
+_COLOR_RE = re.compile(r'#[0-9A-Fa-f]{6}')
+_MISSING = object()
+
+# Upper bounds of unbounded-looking settings, so no value can overflow the overlay's pixel math
+MAX_LENGTH = 1000 # Parametric sizes, thicknesses, lengths and gaps, in pixels
+MAX_SCALE = 20.0 # Image/GIF scale factor
+MAX_SPEED = 1000 # GIF speed, in percent
+
+class SettingsError(ValueError):
+    """Raised for invalid settings; errors lists every problem found (e.g. "static.opacity: ...")."""
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+# --- Field types ---
+# Each field's check is a Python expression over {v}, the value, and {c}, a
+# constant of the field (e.g. its set of choices). It is compiled twice:
+# alone into Field.check, for single values (see parse_patch()), and joined
+# with the other fields of its section into one check over the whole
+# section (see _SectionMeta), so parsing a valid section is a single call.
+
+# Smallest float above 0, so positive numbers are range-checked like the others (low <= v <= high)
+_POSITIVE = math.nextafter(0.0, 1.0)
+
+_color_match = _COLOR_RE.fullmatch
+
+def _compile(parameters, expression, constants):
+    return eval(f"lambda {parameters}: {expression}", {'_color_match': _color_match, 'Mapping': Mapping, **constants})
+
+class Field:
+    """A setting: its default, whether it may be missing, and check(value) -> bool."""
+    __slots__ = ('name', 'default', 'required', 'test', 'constant', 'check', 'message', 'section')
+
+    def __init__(self, default, test, message, constant=None, required=True, section=None):
+        self.name = None # Set by the section class it is declared in
+        self.default = default
+        self.required = required
+        self.test = test # Expression template, see above
+        self.constant = constant
+        self.check = _compile('v', test.format(v='v', c='c'), {'c': constant})
+        self.message = message
+        self.section = section # SettingsSection subclass for nested groups
+
+def flag(default):
+    return Field(default, "{v} is True or {v} is False", "must be a boolean")
+
+def number(default, minimum=None, maximum=None, positive=False):
+    """An int or float (not bool) within [minimum, maximum], > 0 if positive.
+
+    Every number is bounded, which also rejects NaN and Infinity (json.loads accepts them).
+    """
+    low = _POSITIVE if positive else minimum
+    message = f"must be a positive number of at most {maximum}" if positive else f"must be a number between {minimum} and {maximum}"
+    return Field(default, f"(type({{v}}) is int or type({{v}}) is float) and {low!r} <= {{v}} <= {maximum!r}", message)
+
+def color(default):
+    return Field(default, "type({v}) is str and _color_match({v}) is not None", "must be a valid hex string (e.g., #RRGGBB)")
+
+def choice(default, choices, required=True):
+    choices = frozenset(choices)
+    # Hash lookups can fail for unhashable JSON values (lists, dicts), hence the type test first
+    return Field(default, "type({v}) is str and {v} in {c}", f"must be one of {sorted(choices)}", choices, required)
+
+def file_name(default=None):
+    return Field(default, "{v} is None or type({v}) is str", "must be a string or null")
+
+def section(section_class):
+    """A nested group of settings, parsed with section_class."""
+    return Field(None, "type({v}) is dict or isinstance({v}, Mapping)", "missing or invalid settings dictionary",
+                 section=section_class)
+
+# --- Sections ---
+
+class _SectionMeta(ABCMeta):
+    """Collects the Field attributes of a section class (in declaration order) and compiles their checks."""
+    def __new__(mcls, name, bases, namespace):
+        fields = []
+        for attr, value in list(namespace.items()):
+            if isinstance(value, Field):
+                value.name = attr
+                namespace[attr] = property(_value_getter(len(fields)), doc=value.message)
+                fields.append(value)
+        namespace.setdefault('__slots__', ())
+        cls = super().__new__(mcls, name, bases, namespace)
+        if fields:
+            cls._fields = tuple(fields)
+            cls._names = tuple(field.name for field in fields)
+            cls._index = {field.name: i for i, field in enumerate(fields)}
+            cls._defaults = tuple(field.section() if field.section is not None else field.default for field in fields)
+            # (index, key, section class) of nested sections, parsed after the section's own check
+            cls._sections = tuple((i, field.name, field.section) for i, field in enumerate(fields) if field.section is not None)
+            # Fetches every field in one call when none is missing (raises KeyError otherwise)
+            get_all = itemgetter(*cls._names)
+            cls._get_values = staticmethod(get_all if len(fields) > 1 else lambda data: (get_all(data),))
+            # check_values(*values) -> bool, true when every field passes its check
+            cls._check_values = staticmethod(_compile(
+                ", ".join(f"v{i}" for i in range(len(fields))),
+                " and ".join(f"({field.test.format(v=f'v{i}', c=f'c{i}')})" for i, field in enumerate(fields)),
+                {f'c{i}': field.constant for i, field in enumerate(fields)}))
+        return cls
+
+def _value_getter(index):
+    return lambda self: self._values[index]
+
+class SettingsSection(Mapping, metaclass=_SectionMeta):
+    """Immutable group of typed settings with a fixed set of fields.
+
+    Subclasses list their fields as class attributes built with the field
+    functions above; they become read-only properties over a single slot
+    holding all values as a tuple, so building, comparing and hashing an
+    instance are single tuple operations. Instances are also Mappings, so
+    code that reads settings dicts (settings.get(...), settings['opacity'],
+    ==) works with them unchanged.
+    """
+    __slots__ = ('_values',)
+    _fields = ()
+    _names = ()
+    _index = {}
+
+    def __init__(self, **values):
+        object.__setattr__(self, '_values', tuple(
+            values[field.name] if field.name in values
+            else (field.section() if field.section is not None else field.default)
+            for field in self._fields))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def __getitem__(self, key):
+        index = self._index.get(key)
+        if index is None:
+            raise KeyError(key)
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash(self._values)
+
+    def __reduce__(self):
+        return (_rebuild, (type(self), self._values))
+
+    def __repr__(self):
+        values = ', '.join(f"{name}={value!r}" for name, value in zip(self._names, self._values))
+        return f"{type(self).__name__}({values})"
+
+    def replace(self, **changes):
+        """Returns a copy with some fields changed (not validated)."""
+        return type(self)(**{**dict(zip(self._names, self._values)), **changes})
+
+    def merged(self, changes):
+        """Returns a copy with a nested dict of changes applied (not validated; see parse_patch()).
+
+        Sections the changes don't touch are shared with self, not copied.
+        """
+        values = list(self._values)
+        for name, value in changes.items():
+            index = self._index[name]
+            if isinstance(values[index], SettingsSection):
+                value = values[index].merged(value)
+            values[index] = value
+        values = tuple(values)
+        return self if values == self._values else _rebuild(type(self), values)
+
+    def to_dict(self):
+        """Returns plain dicts, e.g. for json.dumps()."""
+        return {name: (value.to_dict() if isinstance(value, SettingsSection) else value)
+                for name, value in zip(self._names, self._values)}
+
+    @classmethod
+    def _parse(cls, data, path, errors):
+        """Builds an instance from a dict, appending every problem to errors.
+
+        Invalid or missing fields get their default, so parsing always
+        returns an instance; callers decide whether errors are fatal.
+        """
+        try:
+            values = cls._get_values(data)
+        except KeyError: # Some field is missing; _repair() reports it if required
+            values = tuple([data.get(name, _MISSING) for name in cls._names])
+        if not cls._check_values(*values):
+            return cls._repair(values, path, errors)
+        if cls._sections:
+            values = list(values)
+            for i, key, section_class in cls._sections:
+                values[i] = section_class._parse(values[i], f"{path}{key}.", errors)
+            values = tuple(values)
+        return _rebuild(cls, values)
+
+    @classmethod
+    def _repair(cls, values, path, errors):
+        """The slow part of _parse(): reports invalid fields, replacing them with their defaults, and parses nested sections."""
+        values = list(values)
+        for i, field in enumerate(cls._fields):
+            value = values[i]
+            if field.check(value):
+                if field.section is not None:
+                    values[i] = field.section._parse(value, f"{path}{field.name}.", errors)
+                continue
+            if value is not _MISSING or field.section is not None:
+                errors.append(f"{path}{field.name}: {field.message}")
+            elif field.required:
+                errors.append(f"{path}{field.name}: missing")
+            values[i] = cls._defaults[i]
+        return _rebuild(cls, tuple(values))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Parses and validates settings. Raises SettingsError listing every problem."""
+        if type(data) is not dict and not isinstance(data, Mapping):
+            raise SettingsError(["Settings must be a dictionary."])
+        errors = []
+        instance = cls._parse(data, '', errors)
+        if errors:
+            raise SettingsError(errors)
+        return instance
+
+    @classmethod
+    def parse_patch(cls, patch):
+        """Validates a JSON merge patch (RFC 7396), looking only at the fields it touches.
+
+        Returns the nested dict of changes to apply with merged(), e.g. by
+        StateManager.merge_settings(). A merge patch removes members set
+        to null; since settings can't lack fields, null sets fields that
+        accept it (image_path) to null, resets optional fields to their
+        default and is an error otherwise. Raises SettingsError listing every
+        problem, including unknown fields.
+        """
+        if not isinstance(patch, Mapping):
+            raise SettingsError(["A settings patch must be a dictionary."])
+        errors = []
+        changes = cls._parse_patch(patch, '', errors)
+        if errors:
+            raise SettingsError(errors)
+        return changes
+
+    @classmethod
+    def _parse_patch(cls, patch, path, errors):
+        changes = {}
+        for name, value in patch.items():
+            index = cls._index.get(name)
+            if index is None:
+                errors.append(f"{path}{name}: unknown setting")
+                continue
+            field = cls._fields[index]
+            if field.section is not None:
+                if field.check(value):
+                    changes[name] = field.section._parse_patch(value, f"{path}{name}.", errors)
+                else:
+                    errors.append(f"{path}{name}: {field.message}")
+            elif field.check(value):
+                changes[name] = value
+            elif value is None and not field.required:
+                changes[name] = field.default
+            else:
+                errors.append(f"{path}{name}: {'cannot be removed' if value is None else field.message}")
+        return changes
+
+def _rebuild(cls, values):
+    instance = object.__new__(cls)
+    _set_values(instance, values)
+    return instance
+
+_set_values = SettingsSection._values.__set__ # The slot itself, skipping the read-only __setattr__
+
+class ParametricSettings(SettingsSection):
+    center_dot_enabled = flag(True)
+    center_dot_color = color("#FF0000") # Red
+    center_dot_size = number(3, 0, MAX_LENGTH)
+    center_dot_opacity = number(200, 0, 255)
+    inner_lines_enabled = flag(True)
+    inner_lines_color = color("#FFFFFF") # White
+    inner_lines_thickness = number(1, 0, MAX_LENGTH)
+    inner_lines_length = number(5, 0, MAX_LENGTH)
+    inner_lines_gap = number(3, 0, MAX_LENGTH)
+    inner_lines_opacity = number(255, 0, 255)
+    outer_lines_enabled = flag(False)
+    outer_lines_color = color("#00FF00") # Green
+    outer_lines_thickness = number(1, 0, MAX_LENGTH)
+    outer_lines_length = number(2, 0, MAX_LENGTH)
+    outer_lines_gap = number(8, 0, MAX_LENGTH)
+    outer_lines_opacity = number(180, 0, 255)
+    outline_enabled = flag(True)
+    outline_color = color("#000000") # Black
+    outline_thickness = number(1, 0, MAX_LENGTH)
+    outline_opacity = number(150, 0, 255)
+    t_shape = flag(False)
+
+class StaticSettings(SettingsSection):
+    image_path = file_name() # Path relative to user_uploads/
+    opacity = number(255, 0, 255)
+    scale = number(1.0, maximum=MAX_SCALE, positive=True)
+
+class AnimatedSettings(SettingsSection):
+    gif_path = file_name() # Path relative to user_uploads/
+    opacity = number(255, 0, 255)
+    scale = number(1.0, maximum=MAX_SCALE, positive=True)
+    speed = number(100, maximum=MAX_SPEED, positive=True) # Percentage
+    # 'auto', 'cache' (keep every frame) or 'stream' (bounded frame buffer); optional, older profiles lack it
+    playback_mode = choice("auto", ('auto', 'cache', 'stream'), required=False)
+
+class CrosshairSettings(SettingsSection):
+    """Complete crosshair settings, as sent by the web UI and stored in profiles."""
+    type = choice("parametric", ('parametric', 'static', 'animated'))
+    parametric = section(ParametricSettings)
+    static = section(StaticSettings)
+    animated = section(AnimatedSettings)
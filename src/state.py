@@ -2,57 +2,44 @@ import json
 import os
 import threading
 import copy # Added copy for deepcopy
+from log import get_logger
+from persistence import WriteBehindWriter, SettingsJournal, atomic_write_json, apply_diff
+from settings_model import CrosshairSettings, SettingsError
 
-# Default settings structure for crosshair profiles
-DEFAULT_SETTINGS = {
-    "type": "parametric", # 'parametric', 'static', 'animated'
-    "parametric": {
-        "center_dot_enabled": True,
-        "center_dot_color": "#FF0000", # Red
-        "center_dot_size": 3,
-        "center_dot_opacity": 200,
-        "inner_lines_enabled": True,
-        "inner_lines_color": "#FFFFFF", # White
-        "inner_lines_thickness": 1,
-        "inner_lines_length": 5,
-        "inner_lines_gap": 3,
-        "inner_lines_opacity": 255,
-        "outer_lines_enabled": False,
-        "outer_lines_color": "#00FF00", # Green
-        "outer_lines_thickness": 1,
-        "outer_lines_length": 2,
-        "outer_lines_gap": 8,
-        "outer_lines_opacity": 180,
-        "outline_enabled": True,
-        "outline_color": "#000000", # Black
-        "outline_thickness": 1,
-        "outline_opacity": 150,
-        "t_shape": False
-    },
-    "static": {
-        "image_path": None, # Path relative to user_uploads/
-        "opacity": 255,
-        "scale": 1.0
-    },
-    "animated": {
-        "gif_path": None, # Path relative to user_uploads/
-        "opacity": 255,
-        "scale": 1.0,
-        "speed": 100 # Percentage
-    }
-}
+logger = get_logger(__name__)
+
+# Default settings structure for crosshair profiles (field types, ranges and defaults live in settings_model)
+DEFAULT_SETTINGS = CrosshairSettings().to_dict()
 
 # Default application configuration
 DEFAULT_APP_CONFIG = {
-    "overlay_x": None, 
-    "overlay_y": None
+    "overlay_x": None, # Legacy: top-left of the old fixed 200x200 window, only read for migration
+    "overlay_y": None,
+    "overlay_center_x": None, # Screen position of the crosshair center
+    "overlay_center_y": None,
+    "asset_cache_mb": 128, # Memory budget for decoded static/animated crosshair images
+    "stream_threshold_mb": 256, # 'auto' playback streams GIFs whose frames would decode to more than this
+    "max_overlay_fps": 0, # Cap on animation repaints per second, 0 = match the display refresh rate
+    "log_level": "INFO" # DEBUG, INFO, WARNING or ERROR; can be changed at runtime from the web UI
 }
 
 class StateManager:
-    """Manages shared state: crosshair settings and app configuration."""
+    """Manages shared state: crosshair settings and app configuration.
+
+    Crosshair settings are held as an immutable, validated
+    CrosshairSettings. Readers get the current one without any copying;
+    writers replace it with a new one that shares the unchanged sections.
+    Every change bumps the settings revision, which wait_for_change()
+    blocks on.
+
+    The live settings and config.json are saved by background writers,
+    so updates never wait for the disk; call flush() before exiting.
+    """
     def __init__(self, user_data_dir):
         self._lock = threading.Lock()
-        self._settings = copy.deepcopy(DEFAULT_SETTINGS)
+        self._settings_changed = threading.Condition(self._lock)
+        self._settings = CrosshairSettings()
+        self._revision = 0
         self._app_config = copy.deepcopy(DEFAULT_APP_CONFIG)
         
         # Ensure user data directory exists
@@ -60,22 +47,81 @@ class StateManager:
         os.makedirs(self._user_data_dir, exist_ok=True)
         
         self._config_file_path = os.path.join(self._user_data_dir, 'config.json')
+        # config.json is written from a background thread, never by the caller of update_app_config()
+        self._config_writer = WriteBehindWriter(self._save_app_config, name='config-writer')
         self._load_app_config()
 
+        # The active crosshair survives restarts: a snapshot plus a journal of changes
+        self._settings_journal = SettingsJournal(self._user_data_dir)
+        self._load_settings()
+        self._settings_writer = WriteBehindWriter(self._save_settings, name='settings-writer')
+
     # --- Crosshair Settings Methods ---
     def get_settings(self):
-        """Returns a deep copy of the current crosshair settings (thread-safe)."""
+        """Returns the current crosshair settings (a read-only CrosshairSettings, never copied)."""
+        with self._lock:
+            return self._settings
+
+    def get_settings_revision(self):
+        """Returns (revision, settings), read together."""
         with self._lock:
-            return copy.deepcopy(self._settings)
+            return self._revision, self._settings
 
     def update_settings(self, new_settings):
-        """Updates the internal crosshair settings dictionary (thread-safe).
-        Assumes validation has happened externally.
+        """Replaces the crosshair settings with a validated CrosshairSettings (thread-safe).
+
+        Returns:
+            (revision, settings) now in effect.
         """
-        settings_copy = copy.deepcopy(new_settings)
         with self._lock:
-            self._settings = settings_copy
-            print(f"State Manager: Crosshair settings updated.")
+            return self._commit_settings_nolock(new_settings)
+
+    def merge_settings(self, changes):
+        """Applies a nested dict of validated changes atomically, returns (revision, settings).
+
+        e.g. merge_settings({'type': 'static', 'static': {'image_path': 'a.png'}})
+        only rebuilds the top level and the 'static' section.
+        """
+        with self._lock:
+            return self._commit_settings_nolock(self._settings.merged(changes))
+
+    def _commit_settings_nolock(self, settings):
+        if settings != self._settings:
+            self._settings = settings
+            self._revision += 1
+            self._settings_changed.notify_all()
+            self._settings_writer.mark_dirty()
+            logger.debug("Crosshair settings updated (revision %d).", self._revision)
+        return self._revision, self._settings
+
+    def wait_for_change(self, since_revision, timeout=None):
+        """Blocks until the settings revision differs from since_revision, or timeout seconds passed.
+
+        Revisions are not saved, so a since_revision from before a restart
+        can be ahead of the current one; that returns right away as well.
+
+        Returns:
+            (revision, settings): the current settings either way; revision
+            is still since_revision if the wait timed out.
+        """
+        with self._settings_changed:
+            self._settings_changed.wait_for(lambda: self._revision != since_revision, timeout)
+            return self._revision, self._settings
+
+    def _load_settings(self):
+        """Restores the settings saved by the last run, filling in keys added since with defaults."""
+        saved = self._settings_journal.load()
+        if isinstance(saved, dict):
+            try:
+                restored = CrosshairSettings.from_dict(apply_diff(DEFAULT_SETTINGS, saved))
+            except SettingsError as e: # e.g. saved by a version with looser checks
+                logger.error("Saved crosshair settings are invalid, using defaults: %s", e)
+                return
+            self._settings = restored
+            logger.info("Restored crosshair settings (type '%s').", self._settings.get('type'))
+
+    def _save_settings(self):
+        self._settings_journal.save(self.get_settings().to_dict())
 
     # --- Application Configuration Methods ---
     def _load_app_config(self):
@@ -85,43 +131,58 @@ class StateManager:
                 if os.path.exists(self._config_file_path):
                     with open(self._config_file_path, 'r') as f:
                         loaded_config = json.load(f)
-                        print(f"State Manager [Load]: Read from file: {loaded_config}") # Log read data
                         # Merge loaded config with defaults to handle missing keys
                         self._app_config.update(loaded_config)
-                        print(f"State Manager [Load]: Merged config: {self._app_config}") # Log merged data
+                        logger.debug("Loaded config: %s", self._app_config)
                 else:
-                    print(f"State Manager: No config file found at {self._config_file_path}, using defaults.")
+                    logger.info("No config file found at %s, using defaults.", self._config_file_path)
                     # Save defaults if file doesn't exist
-                    self._save_app_config_nolock()
+                    self._config_writer.mark_dirty()
             except (json.JSONDecodeError, IOError) as e:
-                print(f"State Manager: Error loading config file {self._config_file_path}: {e}. Using defaults.")
+                logger.error("Error loading config file %s: %s. Using defaults.", self._config_file_path, e)
                 self._app_config = copy.deepcopy(DEFAULT_APP_CONFIG)
 
-    def _save_app_config_nolock(self):
-        """Saves the current application configuration to config.json (no lock)."""
-        try:
-            config_to_save = copy.deepcopy(self._app_config) # Copy before saving
-            print(f"State Manager [Save]: Attempting to write: {config_to_save} to {self._config_file_path}")
-            with open(self._config_file_path, 'w') as f:
-                json.dump(config_to_save, f, indent=4)
-            print(f"State Manager [Save]: Successfully wrote config.")
-        except IOError as e:
-            print(f"State Manager [Save]: Error writing config file {self._config_file_path}: {e}")
-
     def get_app_config(self):
         """Returns a copy of the current application configuration (thread-safe)."""
         with self._lock:
             return copy.deepcopy(self._app_config)
 
     def update_app_config(self, key, value):
-        """Updates a specific key in the app config and saves it (thread-safe)."""
+        """Updates a specific key in the app config and schedules saving it (thread-safe)."""
+        self.update_app_config_values({key: value})
+
+    def update_app_config_values(self, values):
+        """Updates several app config keys at once and schedules one save (thread-safe).
+
+        The file is written in the background once updates stop for a
+        moment, so calling this on every mouse move or key repeat is cheap.
+        """
+        changed = False
         with self._lock:
-            if key in self._app_config:
-                self._app_config[key] = value
-                print(f"State Manager [Update]: Updated '{key}' to '{value}'. Current config: {self._app_config}") # Log before save
-                self._save_app_config_nolock()
-            else:
-                print(f"State Manager: Warning - Attempted to update unknown config key '{key}'.")
+            for key, value in values.items():
+                if key not in self._app_config:
+                    logger.warning("Attempted to update unknown config key '%s'.", key)
+                elif self._app_config[key] != value:
+                    self._app_config[key] = value
+                    changed = True
+                    logger.debug("Updated config '%s' to %r", key, value)
+        if changed:
+            self._config_writer.mark_dirty()
+
+    def _save_app_config(self):
+        atomic_write_json(self._config_file_path, self.get_app_config(), indent=4)
+
+    def flush(self):
+        """Writes pending settings and app config changes now and stops the background writers (call at shutdown)."""
+        self._settings_writer.close()
+        self._config_writer.close()
+
+    def get_persistence_stats(self):
+        """Returns counters of the background writers (requested, written, saved by coalescing, ...)."""
+        return {
+            'config': self._config_writer.stats(),
+            'settings': {**self._settings_writer.stats(), **self._settings_journal.stats()},
+        }
 
     # --- Profile Management Methods (Basic stubs) ---
 
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Name of the thumbnail cache folder inside the user data directory
+THUMBNAIL_FOLDER = 'thumbnails'
+# Thumbnail edge lengths that may be requested; other sizes snap up to the next one
+THUMBNAIL_SIZES = (32, 48, 64, 96, 128, 192, 256)
+DEFAULT_THUMBNAIL_SIZE = 64
+# Upper bound on the number of frames kept in an animated preview
+MAX_PREVIEW_FRAMES = 24
+# Sprite sheets are stored in this subfolder of the thumbnail cache
+SPRITE_FOLDER = 'sprites'
+# Maximum number of tiles per sprite sheet row
+SPRITE_COLUMNS = 8
+# Minimum per-frame delay (ms) of an animated preview, browsers clamp lower values anyway
+MIN_PREVIEW_FRAME_DELAY = 20
+
+def snap_thumbnail_size(size):
+    """Maps a requested size onto one of THUMBNAIL_SIZES so the cache stays bounded."""
+    for allowed in THUMBNAIL_SIZES:
+        if size <= allowed:
+            return allowed
+    return THUMBNAIL_SIZES[-1]
+
+def _fit_frame(frame, size):
+    """Returns an RGBA copy of a frame downscaled to fit a size x size box."""
+    frame = frame.convert('RGBA')
+    frame.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return frame
+
+def render_poster(source_path, dest_path, size):
+    """Writes a static PNG poster of the first visible frame of an image."""
+    with Image.open(source_path) as img:
+        poster = None
+        for index in range(getattr(img, 'n_frames', 1)):
+            img.seek(index)
+            frame = img.convert('RGBA')
+            if poster is None:
+                poster = frame
+            if frame.getchannel('A').getbbox(): # Skip leading fully transparent frames
+                poster = frame
+                break
+        poster = _fit_frame(poster, size)
+    tmp_path = dest_path + '.tmp'
+    poster.save(tmp_path, format='PNG', optimize=True)
+    os.replace(tmp_path, dest_path)
+
+def render_animated_preview(source_path, dest_path, size, max_frames=MAX_PREVIEW_FRAMES):
+    """Writes a downscaled GIF preview that keeps at most max_frames frames.
+
+    Frames are sampled evenly and their delays summed so the preview keeps
+    roughly the same loop duration as the source.
+    """
+    with Image.open(source_path) as img:
+        frame_count = getattr(img, 'n_frames', 1)
+        step = max(1, -(-frame_count // max_frames)) # Ceiling division
+        frames = []
+        durations = []
+        for index in range(frame_count):
+            img.seek(index)
+            delay = img.info.get('duration', 100) or 100
+            if index % step == 0:
+                frames.append(_fit_frame(img, size))
+                durations.append(delay)
+            else:
+                durations[-1] += delay
+    durations = [max(MIN_PREVIEW_FRAME_DELAY, d) for d in durations]
+    tmp_path = dest_path + '.tmp'
+    frames[0].save(tmp_path, format='GIF', save_all=True, append_images=frames[1:],
+                   duration=durations, loop=0, disposal=2, optimize=False)
+    os.replace(tmp_path, dest_path)
+
+class ThumbnailCache:
+    """Disk cache of preset thumbnails generated lazily in a worker pool.
+
+    Cache entries are named after a hash of the source path, size and mtime,
+    so a changed source file automatically gets a fresh thumbnail.
+    """
+    def __init__(self, cache_dir, max_workers=2):
+        self._cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._lock = threading.Lock()
+        self._pending = {} # cache path -> Future, so concurrent requests share one render
+
+    def _cache_path(self, source_path, size, animated):
+        stat = os.stat(source_path)
+        key = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}|{size}|{int(animated)}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        ext = 'gif' if animated else 'png'
+        return os.path.join(self._cache_dir, f"{stem}-{size}-{digest}.{ext}")
+
+    def get(self, source_path, size=DEFAULT_THUMBNAIL_SIZE, animated=False, timeout=30):
+        """Returns the path of a cached thumbnail, rendering it first if needed."""
+        size = snap_thumbnail_size(size)
+        cache_path = self._cache_path(source_path, size, animated)
+        if os.path.exists(cache_path):
+            return cache_path
+
+        with self._lock:
+            future = self._pending.get(cache_path)
+            if future is None:
+                render = render_animated_preview if animated else render_poster
+                future = self._executor.submit(render, source_path, cache_path, size)
+                self._pending[cache_path] = future
+        try:
+            future.result(timeout=timeout)
+        finally:
+            with self._lock:
+                if self._pending.get(cache_path) is future and future.done():
+                    del self._pending[cache_path]
+        return cache_path
+
+    def prefetch(self, source_paths, size=DEFAULT_THUMBNAIL_SIZE):
+        """Queues poster generation for several files without waiting for them."""
+        size = snap_thumbnail_size(size)
+        for source_path in source_paths:
+            try:
+                cache_path = self._cache_path(source_path, size, False)
+            except OSError:
+                continue
+            if os.path.exists(cache_path):
+                continue
+            with self._lock:
+                if cache_path not in self._pending:
+                    future = self._executor.submit(render_poster, source_path, cache_path, size)
+                    self._pending[cache_path] = future
+                    future.add_done_callback(lambda f, p=cache_path: self._forget(p, f))
+
+    def get_sprite_sheet(self, records, size=DEFAULT_THUMBNAIL_SIZE):
+        """Returns a packed sprite sheet of the posters of several presets.
+
+        Args:
+            records: list of catalog records ({'path', 'etag', ...}) with a 'filename' key
+            size: tile edge length (snapped like thumbnail sizes)
+        Returns:
+            dict with 'key' (content hash, also the image file name), 'width', 'height',
+            'tile_size' and 'tiles' mapping filename -> [x, y, w, h].
+        """
+        size = snap_thumbnail_size(size)
+        # The sheet depends only on which files are on the page and their versions
+        key_source = '|'.join(f"{r['filename']}:{r['etag']}" for r in records) + f"|{size}"
+        key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:20]
+        sprite_dir = os.path.join(self._cache_dir, SPRITE_FOLDER)
+        image_path = os.path.join(sprite_dir, f"{key}.png")
+        map_path = os.path.join(sprite_dir, f"{key}.json")
+
+        if os.path.exists(image_path) and os.path.exists(map_path):
+            try:
+                with open(map_path, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass # Rebuild a damaged map below
+
+        # Render all missing posters in parallel, then pack them
+        self.prefetch((r['path'] for r in records), size)
+        columns = max(1, min(SPRITE_COLUMNS, len(records)))
+        rows = max(1, math.ceil(len(records) / columns))
+        sheet = Image.new('RGBA', (columns * size, rows * size), (0, 0, 0, 0))
+        tiles = {}
+        for index, record in enumerate(records):
+            try:
+                poster_path = self.get(record['path'], size, animated=False)
+                with Image.open(poster_path) as poster:
+                    poster = poster.convert('RGBA')
+                    # Center each poster in its cell
+                    x = (index % columns) * size + (size - poster.width) // 2
+                    y = (index // columns) * size + (size - poster.height) // 2
+                    sheet.paste(poster, (x, y))
+                    tiles[record['filename']] = [x, y, poster.width, poster.height]
+            except Exception as e:
+                logger.warning("Could not add %s to sprite sheet: %s", record['filename'], e)
+
+        sprite = {'key': key, 'width': sheet.width, 'height': sheet.height, 'tile_size': size, 'tiles': tiles}
+        os.makedirs(sprite_dir, exist_ok=True)
+        tmp_suffix = f".{threading.get_ident()}.tmp" # Concurrent builds of the same page must not collide
+        sheet.save(image_path + tmp_suffix, format='PNG', optimize=True)
+        os.replace(image_path + tmp_suffix, image_path)
+        with open(map_path + tmp_suffix, 'w') as f:
+            json.dump(sprite, f)
+        os.replace(map_path + tmp_suffix, map_path)
+        return sprite
+
+    def sprite_image_path(self, key):
+        """Returns the path of a generated sprite sheet image, or None if the key is unknown."""
+        if not key.isalnum():
+            return None
+        path = os.path.join(self._cache_dir, SPRITE_FOLDER, f"{key}.png")
+        return path if os.path.exists(path) else None
+
+    def _forget(self, cache_path, future):
+        with self._lock:
+            if self._pending.get(cache_path) is future:
+                del self._pending[cache_path]
@@ -0,0 +1,50 @@
+import threading
+
+class LatestValueMailbox:
+    """Single-slot, thread-safe mailbox where a newer value replaces the pending one.
+
+    Producers call post() from any thread; the consumer take()s the value
+    when it gets to it. Values posted in between are never seen by the
+    consumer (they are counted as coalesced), so a burst of updates costs
+    the consumer one delivery.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._full = False
+        self._enqueued = 0
+        self._coalesced = 0 # Values replaced before they were taken
+        self._delivered = 0
+
+    def post(self, value):
+        """Stores value, replacing any pending one.
+
+        Returns:
+            True if the mailbox was empty, i.e. the caller has to wake the consumer.
+        """
+        with self._lock:
+            was_empty = not self._full
+            if not was_empty:
+                self._coalesced += 1
+            self._value = value
+            self._full = True
+            self._enqueued += 1
+            return was_empty
+
+    def take(self):
+        """Returns (True, value) and empties the mailbox, or (False, None) if it is empty."""
+        with self._lock:
+            if not self._full:
+                return False, None
+            value, self._value, self._full = self._value, None, False
+            self._delivered += 1
+            return True, value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enqueued': self._enqueued,
+                'coalesced': self._coalesced,
+                'delivered': self._delivered,
+                'pending': self._full,
+            }
@@ -113,6 +113,10 @@ function loadThemePreference() {
 
 // --- Global state variable to hold the last known settings --- 
 let currentAppSettings = {};
+let settingsRevision = 0; // Server revision currentAppSettings corresponds to
+let localUpdatesInFlight = 0; // Updates sent from this page that haven't been answered yet
+let deferredRemoteSettings = null; // Newest {revision, settings} watched while local updates were in flight
+let answeredRevision = 0; // Highest revision the server answered this page's updates with meanwhile
 
 document.addEventListener('DOMContentLoaded', () => {
     // --- Element References ---
@@ -128,6 +132,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const profileListSelect = document.getElementById('profileList');
     const loadProfileBtn = document.getElementById('loadProfileBtn');
     const deleteProfileBtn = document.getElementById('deleteProfileBtn');
+    const logLevelSelect = document.getElementById('logLevel');
     const statusMessagesDiv = document.getElementById('statusMessages'); // Get status div
     const themeToggle = document.getElementById('themeToggle'); // Get theme toggle
     const allCards = document.querySelectorAll('.card'); // Get all cards for mobile accordion
@@ -141,6 +146,8 @@ document.addEventListener('DOMContentLoaded', () => {
     let currentPresetPage = 1;
     let totalPresetPages = 1;
     const presetsPerPage = 24; // Match server default or set desired value
+    const presetThumbScale = Math.min(2, Math.ceil(window.devicePixelRatio || 1)); // Sharp thumbnails on HiDPI
+    const presetThumbSize = 64 * presetThumbScale; // Pixel size requested from /preset_thumb
 
     // Load and apply theme preference
     loadThemePreference();
@@ -526,6 +533,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Animated specific
         if (settings.animated) {
             setInputValue('gifSpeed', settings.animated.speed, true);
+            setInputValue('gifPlaybackMode', settings.animated.playback_mode ?? 'auto');
         }
         
         // Set image preview
@@ -578,7 +586,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 gif_path: currentAppSettings.animated?.gif_path ?? null,
                 opacity: getRangeValue('imageOpacity', 255),
                 scale: getInputValue('imageScale', true, 1.0),
-                speed: getInputValue('gifSpeed', true, 100)
+                speed: getInputValue('gifSpeed', true, 100),
+                playback_mode: getInputValue('gifPlaybackMode', false, currentAppSettings.animated?.playback_mode ?? 'auto')
             }
         };
 
@@ -608,10 +617,30 @@ document.addEventListener('DOMContentLoaded', () => {
         };
     }
 
-    // Function to send update to the server
+    // Returns the JSON merge patch (RFC 7396) turning oldValue into newValue, or null if they are equal
+    function createMergePatch(oldValue, newValue) {
+        const isObject = value => value !== null && typeof value === 'object' && !Array.isArray(value);
+        if (!isObject(oldValue) || !isObject(newValue)) {
+            return JSON.stringify(oldValue) === JSON.stringify(newValue) ? null : newValue;
+        }
+        const patch = {};
+        for (const [key, value] of Object.entries(newValue)) {
+            const change = key in oldValue ? createMergePatch(oldValue[key], value) : value;
+            if (change !== null || (value === null && oldValue[key] !== null)) {
+                patch[key] = change;
+            }
+        }
+        return Object.keys(patch).length ? patch : null;
+    }
+
+    // Function to send update to the server (only the settings that changed)
     async function sendUpdate() {
         const newSettings = getCurrentSettingsFromUI();
-        console.log("Sending settings:", JSON.stringify(newSettings)); 
+        const patch = createMergePatch(currentAppSettings, newSettings);
+        if (!patch) {
+            return; // Nothing changed, e.g. a control was set back to its value
+        }
+        console.log("Sending settings patch:", JSON.stringify(patch));
         
         // Show subtle loading indicator or status change
         const activeCard = document.querySelector(`#${newSettings.type}Controls`);
@@ -619,13 +648,14 @@ document.addEventListener('DOMContentLoaded', () => {
             activeCard.style.opacity = '0.8';
         }
         
+        localUpdatesInFlight++;
         try {
-            const response = await fetch('/update_settings', {
-                method: 'POST',
+            const response = await fetch('/settings', {
+                method: 'PATCH',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Content-Type': 'application/merge-patch+json',
                 },
-                body: JSON.stringify(newSettings),
+                body: JSON.stringify(patch),
             });
             if (!response.ok) {
                 const errorData = await response.json();
@@ -633,6 +663,8 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const result = await response.json();
             console.log("Update result:", result);
+            noteSettingsRevision(result.revision);
+            answeredRevision = Math.max(answeredRevision, result.revision);
             currentAppSettings = newSettings; 
             setPreviewImage(newSettings); 
             showStatusMessage("Settings updated", "success", 1500); // Show brief success feedback
@@ -640,10 +672,46 @@ document.addEventListener('DOMContentLoaded', () => {
             console.error("Error sending settings update:", error);
             showStatusMessage(`Failed to update settings: ${error.message}`, "error"); 
         } finally {
+            localUpdatesInFlight--;
             // Restore opacity
             if (activeCard) {
                 activeCard.style.opacity = '1';
             }
+            if (localUpdatesInFlight === 0) {
+                applyDeferredRemoteSettings();
+            }
+        }
+    }
+
+    // Catches up with changes made elsewhere while this page's own updates were in flight
+    async function applyDeferredRemoteSettings() {
+        const deferred = deferredRemoteSettings;
+        const answered = answeredRevision;
+        deferredRemoteSettings = null;
+        answeredRevision = 0;
+        if (!deferred) {
+            return;
+        }
+        if (deferred.revision >= answered) {
+            // Not older than our own last update, so it already includes it
+            currentAppSettings = deferred.settings;
+            populateControls(currentAppSettings);
+            return;
+        }
+        // Our update was applied on top of it; get the settings that combine both
+        try {
+            const response = await fetch('/get_settings');
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const settings = await response.json();
+            if (localUpdatesInFlight === 0) {
+                currentAppSettings = settings;
+                populateControls(currentAppSettings);
+            }
+            noteSettingsRevision(parseInt(response.headers.get('X-Settings-Revision'), 10));
+        } catch (error) {
+            console.error("Error fetching settings changed elsewhere:", error);
         }
     }
     const debouncedSendUpdate = debounce(sendUpdate, 300);
@@ -658,6 +726,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const settings = await response.json();
             console.log("Fetched settings:", settings);
+            noteSettingsRevision(parseInt(response.headers.get('X-Settings-Revision'), 10));
             currentAppSettings = settings; 
             populateControls(currentAppSettings);
             // Re-initialize number steppers after populating controls
@@ -672,6 +741,75 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function noteSettingsRevision(revision) {
+        if (Number.isInteger(revision) && revision > settingsRevision) {
+            settingsRevision = revision;
+        }
+    }
+
+    // Long-polls the server for settings changed elsewhere (another browser, a profile load, ...)
+    async function watchSettings() {
+        while (true) {
+            try {
+                const response = await fetch(`/get_settings?since=${settingsRevision}&wait=30`);
+                if (response.status === 200) {
+                    const revision = parseInt(response.headers.get('X-Settings-Revision'), 10);
+                    const settings = await response.json();
+                    // A lower revision than ours means the app was restarted (revisions start over)
+                    if (revision !== settingsRevision) {
+                        if (localUpdatesInFlight === 0) {
+                            currentAppSettings = settings;
+                            populateControls(currentAppSettings);
+                        } else {
+                            // Don't reset controls the user is still moving; applied once our updates are answered
+                            deferredRemoteSettings = { revision, settings };
+                        }
+                    }
+                    if (Number.isInteger(revision)) {
+                        settingsRevision = revision;
+                    }
+                } else if (response.status !== 204) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+            } catch (error) {
+                console.error("Error watching settings:", error);
+                await new Promise(resolve => setTimeout(resolve, 5000)); // Server restarting or unreachable
+            }
+        }
+    }
+
+    // --- Log Level ---
+    async function fetchLogLevel() {
+        try {
+            const response = await fetch('/log_level');
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const result = await response.json();
+            logLevelSelect.value = result.level;
+        } catch (error) {
+            console.error("Error fetching log level:", error);
+        }
+    }
+
+    async function handleLogLevelChange() {
+        try {
+            const response = await fetch('/log_level', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ level: logLevelSelect.value })
+            });
+            const result = await response.json();
+            if (!response.ok) {
+                throw new Error(result.error || `HTTP error! status: ${response.status}`);
+            }
+            showStatusMessage(`Log level set to ${result.level}`, "success", 1500);
+        } catch (error) {
+            console.error("Error setting log level:", error);
+            showStatusMessage(`Failed to set log level: ${error.message}`, "error");
+        }
+    }
+
     // --- Image Upload Handler ---
     async function handleImageUpload(event) {
         const file = event.target.files[0];
@@ -710,6 +848,7 @@ document.addEventListener('DOMContentLoaded', () => {
             
             console.log("Upload successful:", result);
             // Update global state and UI with the new settings returned from server
+            noteSettingsRevision(result.revision);
             currentAppSettings = result.new_settings;
             populateControls(currentAppSettings);
             showStatusMessage(`${file.name} uploaded successfully!`, "success", 3000);
@@ -922,14 +1061,19 @@ document.addEventListener('DOMContentLoaded', () => {
     async function fetchGifPresets(page = 1) {
         console.log(`Fetching presets page: ${page}`);
         try {
-            const response = await fetch(`/list_gif_presets?page=${page}&per_page=${presetsPerPage}`);
+            // One request for the page + sprite map, one for the sprite image itself
+            let response = await fetch(`/preset_sprites?page=${page}&per_page=${presetsPerPage}&size=${presetThumbSize}`);
+            if (!response.ok) {
+                console.warn(`Sprite sheet unavailable (status ${response.status}), falling back to per-preset thumbnails`);
+                response = await fetch(`/list_gif_presets?page=${page}&per_page=${presetsPerPage}`);
+            }
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             const data = await response.json();
             
             if (data.success) {
-                populatePresetGrid(data.presets);
+                populatePresetGrid(data.presets, data.sprite);
                 currentPresetPage = data.page;
                 totalPresetPages = Math.ceil(data.total_presets / data.per_page);
                 updatePaginationControls(data.total_presets);
@@ -944,8 +1088,54 @@ document.addEventListener('DOMContentLoaded', () => {
             updatePaginationControls(0);
         }
     }
+
+    // Thumbnail URLs carry the preset's version, so the browser may cache them for long without going stale
+    function presetThumbUrl(preset, animated = false) {
+        const params = new URLSearchParams({ size: presetThumbSize });
+        if (animated) params.set('animated', '1');
+        if (preset.version) params.set('v', preset.version);
+        return `/preset_thumb/${encodeURIComponent(preset.filename)}?${params}`;
+    }
+
+    // Builds the thumbnail element of a preset card, from the page sprite sheet when available
+    function createPresetThumb(preset, sprite) {
+        const displaySize = presetThumbSize / presetThumbScale;
+        const thumbUrl = presetThumbUrl(preset);
+        const tile = sprite?.tiles?.[preset.filename];
+
+        if (!tile) {
+            const img = document.createElement('img');
+            img.src = thumbUrl;
+            img.alt = preset.name;
+            img.loading = 'lazy'; // Lazy load images
+            img.width = displaySize;
+            img.height = displaySize;
+            return img;
+        }
+
+        // Show the preset's whole cell of the sprite sheet (tiles are centered in their cell)
+        const thumb = document.createElement('div');
+        thumb.className = 'preset-thumb';
+        thumb.setAttribute('role', 'img');
+        thumb.setAttribute('aria-label', preset.name);
+        thumb.style.width = `${displaySize}px`;
+        thumb.style.height = `${displaySize}px`;
+        const cellX = Math.floor(tile[0] / sprite.tile_size) * sprite.tile_size;
+        const cellY = Math.floor(tile[1] / sprite.tile_size) * sprite.tile_size;
+        thumb.dataset.spritePosition = `-${cellX / presetThumbScale}px -${cellY / presetThumbScale}px`;
+        thumb.dataset.spriteSize = `${sprite.width / presetThumbScale}px ${sprite.height / presetThumbScale}px`;
+        thumb.dataset.spriteUrl = `url("${sprite.url}")`;
+        showSpriteTile(thumb);
+        return thumb;
+    }
+
+    function showSpriteTile(thumb) {
+        thumb.style.backgroundImage = thumb.dataset.spriteUrl;
+        thumb.style.backgroundPosition = thumb.dataset.spritePosition;
+        thumb.style.backgroundSize = thumb.dataset.spriteSize;
+    }
     
-    function populatePresetGrid(presets) {
+    function populatePresetGrid(presets, sprite = null) {
         gifPresetGrid.innerHTML = ''; // Clear previous presets
         if (!presets || presets.length === 0) {
             gifPresetGrid.innerHTML = '<p class="preset-empty">No presets found.</p>';
@@ -957,11 +1147,26 @@ document.addEventListener('DOMContentLoaded', () => {
             card.className = 'preset-card';
             card.dataset.filename = preset.filename;
             
-            const img = document.createElement('img');
-            // Use get_preset route for thumbnail/image source
-            img.src = `/get_preset/${encodeURIComponent(preset.filename)}`; 
-            img.alt = preset.name;
-            img.loading = 'lazy'; // Lazy load images
+            // Small cached poster; swap to a short animated preview on hover
+            const thumb = createPresetThumb(preset, sprite);
+            const animatedUrl = presetThumbUrl(preset, true);
+            card.addEventListener('mouseenter', () => {
+                if (thumb.tagName === 'IMG') {
+                    thumb.dataset.posterSrc = thumb.src;
+                    thumb.src = animatedUrl;
+                } else {
+                    thumb.style.backgroundImage = `url("${animatedUrl}")`;
+                    thumb.style.backgroundPosition = 'center';
+                    thumb.style.backgroundSize = 'contain';
+                }
+            });
+            card.addEventListener('mouseleave', () => {
+                if (thumb.tagName === 'IMG') {
+                    thumb.src = thumb.dataset.posterSrc || thumb.src;
+                } else {
+                    showSpriteTile(thumb);
+                }
+            });
             
             const nameSpan = document.createElement('span');
             nameSpan.className = 'preset-name';
@@ -971,7 +1176,7 @@ document.addEventListener('DOMContentLoaded', () => {
             infoSpan.className = 'preset-info';
             infoSpan.textContent = `(${preset.extension}, ${preset.size_kb} KB)`;
 
-            card.appendChild(img);
+            card.appendChild(thumb);
             card.appendChild(nameSpan);
             card.appendChild(infoSpan);
             
@@ -1058,6 +1263,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(result.error || `HTTP error! status: ${response.status}`);
             }
             if (result.success && result.settings) {
+                noteSettingsRevision(result.revision);
                 currentAppSettings = result.settings; // Update global state
                 populateControls(currentAppSettings); // Update UI controls
                 updateSelectedPresetCard(); // Update highlight
@@ -1094,6 +1300,9 @@ document.addEventListener('DOMContentLoaded', () => {
         saveProfileBtn.addEventListener('click', handleSaveProfile);
         loadProfileBtn.addEventListener('click', handleLoadProfile);
         deleteProfileBtn.addEventListener('click', handleDeleteProfile);
+
+        // Log level
+        logLevelSelect.addEventListener('change', handleLogLevelChange);
         
         // Profile name input (Enter key)
         profileNameInput.addEventListener('keypress', (e) => {
@@ -1113,6 +1322,8 @@ document.addEventListener('DOMContentLoaded', () => {
         console.log("Initializing app...");
         await fetchAndApplySettings();
         await fetchAndPopulateProfiles();
+        fetchLogLevel();
+        watchSettings(); // Runs for the lifetime of the page
         fetchGifPresets(1); // Initial fetch for presets
         setupControlListeners(); // Call the listener setup function
         
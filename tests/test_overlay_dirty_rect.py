@@ -0,0 +1,69 @@
+import math
+
+import pytest
+from PySide6.QtCore import QRect, QSize
+from PySide6.QtWidgets import QApplication
+
+from overlay import OverlayWidget
+from state import StateManager
+
+SOURCE_SIZE = QSize(40, 40)
+
+class _Frames:
+    """Stands in for a FrameStore that reports one changed rect for every frame."""
+    def __init__(self, dirty):
+        self.dirty = dirty
+
+    def frame_dirty_rect(self, index):
+        return self.dirty
+
+class _Animation:
+    def __init__(self, dirty):
+        self._frames = _Frames(dirty)
+
+    def frames(self):
+        return self._frames
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def overlay(app, tmp_path):
+    widget = OverlayWidget(StateManager(str(tmp_path)))
+    widget.resize(200, 200)
+    widget._animation_frame_size = SOURCE_SIZE
+    yield widget
+    widget.animation = None
+    widget.deleteLater()
+
+def _blended_area(widget, dirty, scale):
+    """The widget pixels whose smoothly scaled value depends on a pixel of dirty.
+
+    Bilinear scaling samples output pixel X at source position (X + 0.5) / scale - 0.5
+    and blends the two source pixels around it.
+    """
+    w = int(SOURCE_SIZE.width() * scale)
+    h = int(SOURCE_SIZE.height() * scale)
+    sx = w / SOURCE_SIZE.width()
+    sy = h / SOURCE_SIZE.height()
+    x0 = widget.width() // 2 - w // 2
+    y0 = widget.height() // 2 - h // 2
+    left = math.floor((dirty.left() - 1 + 0.5) * sx - 0.5)
+    top = math.floor((dirty.top() - 1 + 0.5) * sy - 0.5)
+    right = math.ceil((dirty.right() + 1 + 0.5) * sx - 0.5)
+    bottom = math.ceil((dirty.bottom() + 1 + 0.5) * sy - 0.5)
+    return QRect(x0 + left, y0 + top, right - left + 1, bottom - top + 1)
+
+@pytest.mark.parametrize('scale', [1.0, 1.5, 2.0, 3.0, 4.5, 8.0])
+def test_dirty_rect_covers_smooth_scaling_bleed(overlay, scale):
+    dirty = QRect(10, 12, 1, 3)
+    overlay.animation = _Animation(dirty)
+    overlay._display_settings = {'animated': {'scale': scale}}
+    rect = overlay._animation_dirty_rect(1)
+    assert rect.contains(_blended_area(overlay, dirty, scale))
+
+def test_unchanged_frame_has_no_dirty_rect(overlay):
+    overlay.animation = _Animation(None)
+    overlay._display_settings = {'animated': {'scale': 3.0}}
+    assert overlay._animation_dirty_rect(1) is None